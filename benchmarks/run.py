@@ -0,0 +1,369 @@
+"""Measure the overhead of django_statsd
+
+Runs the test project under the Django test client (sequentially, from a
+pool of threads and through ASGI) with and without the instrumentation and
+sends the metrics to a local UDP sink which counts the packets and bytes::
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json
+
+With `--compare` the exit status is 1 when any of the timings got slower
+than the baseline by more than `--tolerance`. The timings depend on the
+machine so only compare against baselines recorded on the same machine.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import threading
+import contextlib
+import statistics
+from concurrent import futures
+
+
+class UDPSink(object):
+    """Counts the statsd packets and bytes sent to it"""
+
+    def __init__(self, host="127.0.0.1"):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        self.socket.bind((host, 0))
+        self.socket.settimeout(0.05)
+        self.port = self.socket.getsockname()[1]
+        self.packets = 0
+        self.bytes = 0
+        self.received = time.time()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                data = self.socket.recv(65535)
+            except socket.timeout:
+                continue
+            self.packets += 1
+            self.bytes += len(data)
+            self.received = time.time()
+
+    def drain(self, quiet=0.1):
+        """Wait until no packets were received for `quiet` seconds
+
+        Waits at least `quiet` seconds so the packets still in flight after
+        the workload are counted as well.
+        """
+        deadline = time.time() + quiet
+        while True:
+            remaining = max(deadline, self.received + quiet) - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def reset(self):
+        self.drain()
+        self.packets = 0
+        self.bytes = 0
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.socket.close()
+
+
+def setup(sink):
+    os.environ["STATSD_BENCHMARK_PORT"] = str(sink.port)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def configure(statsd=True, track_middleware=False):
+    """Enable or disable the middleware for the duration of a benchmark"""
+    from django.conf import settings as django_settings
+    from django.test import override_settings
+    from django_statsd import settings
+
+    middleware = [
+        m for m in django_settings.MIDDLEWARE if not m.startswith("django_statsd.")
+    ]
+    if statsd:
+        middleware.insert(0, "django_statsd.middleware.StatsdMiddleware")
+        if track_middleware:
+            middleware.append("django_statsd.middleware.StatsdMiddlewareTimer")
+
+    original = settings.STATSD_TRACK_MIDDLEWARE
+    settings.STATSD_TRACK_MIDDLEWARE = track_middleware
+    try:
+        with override_settings(MIDDLEWARE=middleware):
+            yield
+    finally:
+        settings.STATSD_TRACK_MIDDLEWARE = original
+
+
+def summarize(durations, sink):
+    durations.sort()
+    sink.drain()
+    return dict(
+        requests=len(durations),
+        mean_us=statistics.mean(durations) * 1e6,
+        p50_us=durations[len(durations) // 2] * 1e6,
+        p95_us=durations[int(len(durations) * 0.95)] * 1e6,
+        packets_per_request=sink.packets / float(len(durations)),
+        bytes_per_request=sink.bytes / float(len(durations)),
+    )
+
+
+def bench_sequential(sink, url, requests, warmup):
+    from django.test import Client
+
+    client = Client()
+    for _ in range(warmup):
+        client.get(url)
+    sink.reset()
+
+    durations = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url)
+        durations.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return summarize(durations, sink)
+
+
+def bench_threaded(sink, url, requests, threads):
+    from django.test import Client
+
+    local = threading.local()
+
+    def request(_):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+        start = time.perf_counter()
+        client.get(url)
+        return time.perf_counter() - start
+
+    sink.reset()
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(threads) as executor:
+        durations = list(executor.map(request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(durations, sink)
+    result["requests_per_second"] = requests / elapsed
+    return result
+
+
+def bench_asgi(sink, url, requests, concurrency):
+    from django.test import AsyncClient
+
+    async def run():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(url)
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*[request() for _ in range(requests)])
+
+    sink.reset()
+    start = time.perf_counter()
+    durations = list(asyncio.run(run()))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(durations, sink)
+    result["requests_per_second"] = requests / elapsed
+    return result
+
+
+def bench_submit(sink, metrics):
+    """Time submitting `metrics` counters and timers through the backend"""
+    from django_statsd import middleware
+
+    results = {}
+    for name, client_class, add in (
+        ("counter", middleware.Counter, middleware.Counter.increment),
+        ("timer", middleware.Timer, middleware.Timer.add),
+    ):
+        sink.reset()
+        start = time.perf_counter()
+        # Like a request, every client submits 50 distinct keys once
+        for i in range(0, metrics, 50):
+            client = client_class("bench")
+            for j in range(min(50, metrics - i)):
+                add(client, "key%d" % j, 1)
+            client.submit("view")
+        elapsed = time.perf_counter() - start
+        sink.drain()
+        results[name] = dict(
+            metrics=metrics,
+            per_metric_us=elapsed / metrics * 1e6,
+            packets=sink.packets,
+            bytes=sink.bytes,
+        )
+    return results
+
+
+def run(options):
+    sink = UDPSink()
+    setup(sink)
+
+    index = "/test_app/"
+    work = "/bench/work/"
+    requests = options.requests
+    warmup = options.warmup
+    results = {}
+
+    variants = (
+        ("index.no_statsd", index, dict(statsd=False)),
+        ("index.middleware", index, dict()),
+        ("index.track_middleware", index, dict(track_middleware=True)),
+        ("work.no_statsd", work, dict(statsd=False)),
+        ("work.wrappers", work, dict()),
+    )
+    for name, url, config in variants:
+        with configure(**config):
+            results["sequential." + name] = bench_sequential(
+                sink, url, requests, warmup
+            )
+            results["threaded." + name] = bench_threaded(
+                sink, url, requests, options.threads
+            )
+            results["asgi." + name] = bench_asgi(
+                sink, url, requests, options.concurrency
+            )
+
+    overhead = {}
+    for mode in ("sequential", "threaded", "asgi"):
+        for name, base in (
+            ("index.middleware", "index.no_statsd"),
+            ("index.track_middleware", "index.no_statsd"),
+            ("work.wrappers", "work.no_statsd"),
+        ):
+            overhead["%s.%s" % (mode, name)] = (
+                results["%s.%s" % (mode, name)]["mean_us"]
+                - results["%s.%s" % (mode, base)]["mean_us"]
+            )
+
+    submit = bench_submit(sink, options.metrics)
+    sink.close()
+
+    import django
+
+    return dict(
+        python=platform.python_version(),
+        django=django.get_version(),
+        machine=platform.node(),
+        requests=results,
+        overhead_us=overhead,
+        submit=submit,
+    )
+
+
+def timings(result):
+    """Flatten the timings of a result to `{name: microseconds}`"""
+    values = {}
+    for name, stats in result["requests"].items():
+        values["requests.%s.mean_us" % name] = stats["mean_us"]
+        values["requests.%s.p95_us" % name] = stats["p95_us"]
+    for name, stats in result["submit"].items():
+        values["submit.%s.per_metric_us" % name] = stats["per_metric_us"]
+    return values
+
+
+def compare(result, baseline, tolerance):
+    """Print the differences with the baseline and return the regressions"""
+    current = timings(result)
+    previous = timings(baseline)
+    regressions = []
+    print("%-52s %10s %10s %8s" % ("timing", "baseline", "current", "change"))
+    for name in sorted(current):
+        if name not in previous:
+            continue
+        old, new = previous[name], current[name]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = " REGRESSION"
+            regressions.append(name)
+        print("%-52s %10.1f %10.1f %+7.0f%%%s" % (name, old, new, change * 100, flag))
+    return regressions
+
+
+def show(result):
+    print(
+        "%-36s %9s %9s %9s %8s %8s"
+        % ("benchmark", "mean us", "p95 us", "req/s", "packets", "bytes")
+    )
+    for name, stats in sorted(result["requests"].items()):
+        print(
+            "%-36s %9.1f %9.1f %9s %8.1f %8.1f"
+            % (
+                name,
+                stats["mean_us"],
+                stats["p95_us"],
+                (
+                    "%.0f" % stats["requests_per_second"]
+                    if "requests_per_second" in stats
+                    else ""
+                ),
+                stats["packets_per_request"],
+                stats["bytes_per_request"],
+            )
+        )
+    print("")
+    for name, value in sorted(result["overhead_us"].items()):
+        print("overhead %-45s %8.1f us/request" % (name, value))
+    for name, stats in sorted(result["submit"].items()):
+        print(
+            "submit %-15s %8.2f us/metric %8d packets %8d bytes"
+            % (name, stats["per_metric_us"], stats["packets"], stats["bytes"])
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--metrics", type=int, default=10000)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with this baseline JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown compared to the baseline, defaults to 20%%",
+    )
+    options = parser.parse_args(argv)
+
+    result = run(options)
+    show(result)
+
+    if options.save:
+        with open(options.save, "w") as fh:
+            json.dump(result, fh, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as fh:
+            baseline = json.load(fh)
+        print("")
+        if compare(result, baseline, options.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
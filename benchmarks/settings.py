@@ -0,0 +1,29 @@
+# Django settings for the benchmarks, the test project with an in-memory
+# database and statsd pointed at the local sink of the runner
+import os
+
+from tests.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["testserver"]
+ROOT_URLCONF = "benchmarks.urls"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": False,
+    }
+]
+
+STATSD_HOST = "127.0.0.1"
+STATSD_PORT = int(os.environ.get("STATSD_BENCHMARK_PORT", 8125))
+STATSD_TRACK_MIDDLEWARE = False
+STATSD_DEBUG = False
@@ -0,0 +1,8 @@
+from django.urls import include, path
+
+from . import views
+
+urlpatterns = [
+    path("bench/work/", views.work),
+    path("test_app/", include("tests.test_app.urls")),
+]
@@ -0,0 +1,40 @@
+import json
+
+from django import http
+from django.db import connection
+from django.db.backends import utils
+from django.template import engines
+
+import django_statsd
+from django_statsd import cardinality, database
+
+TimingCursor = type(
+    "TimingCursor", (database.TimingCursorWrapper, utils.CursorWrapper), {}
+)
+template = engines["django"].from_string(
+    "{% for item in items %}<li>{{ item.name }}: {{ item.value }}</li>{% endfor %}"
+)
+items = [dict(name="item %d" % i, value=i) for i in range(20)]
+
+
+def fake_redis_command(name):
+    # Does exactly what `StatsdRedis.execute_command` does, without needing a
+    # redis server
+    with django_statsd.with_(
+        "redis.%s" % cardinality.guard("redis", name), detail=True
+    ):
+        pass
+
+
+def work(request):
+    """A view using all of the instrumented libraries"""
+    with connection.cursor() as base:
+        cursor = TimingCursor(base.cursor, connection)
+        for _ in range(5):
+            cursor.execute("SELECT 1")
+
+    for _ in range(5):
+        fake_redis_command("get")
+
+    data = json.loads(json.dumps(items))
+    return http.HttpResponse(template.render(dict(items=data)))
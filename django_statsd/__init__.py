@@ -1,20 +1,26 @@
 from django_statsd.middleware import (
     decr,
+    gauge,
     incr,
+    observe,
     start,
     stop,
+    unique,
     with_,
     wrapper,
     named_wrapper,
     decorator,
 )
-from django_statsd import redis, celery, json, templates
+from django_statsd import redis, celery, json, templates, process
 
 __all__ = [
     "decr",
+    "gauge",
     "incr",
+    "observe",
     "start",
     "stop",
+    "unique",
     "with_",
     "wrapper",
     "named_wrapper",
@@ -23,4 +29,5 @@ __all__ = [
     "redis",
     "celery",
     "templates",
+    "process",
 ]
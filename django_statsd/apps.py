@@ -0,0 +1,50 @@
+from django.apps import AppConfig
+
+from . import settings
+
+if settings.STATSD_TRACK_STARTUP:
+    from . import startup
+
+    # Time the import and `ready()` of the apps loaded after this one
+    startup.patch()
+
+
+class StatsdConfig(AppConfig):
+    name = "django_statsd"
+    verbose_name = "Statsd"
+
+    def ready(self):
+        if settings.STATSD_TRACK_CHANNELS:
+            from . import channels
+
+            channels.patch()
+
+        if settings.STATSD_TRACK_COMMANDS:
+            from . import commands
+
+            commands.patch()
+
+        if settings.STATSD_TRACK_DATABASE:
+            from . import database
+
+            database.patch()
+
+        if settings.STATSD_TRACK_ORM:
+            from . import orm
+
+            orm.patch()
+
+        if settings.STATSD_TRACK_REQUEST_BODY:
+            from . import request_body
+
+            request_body.patch()
+
+        if settings.STATSD_TRACK_STORAGE:
+            from . import storage
+
+            storage.patch()
+
+        if settings.STATSD_TRACK_RESOURCES:
+            from . import resources
+
+            resources.collector.start()
@@ -0,0 +1,16 @@
+from django.utils.module_loading import import_string
+
+from django_statsd import settings
+
+_backend = None
+
+
+def get_backend():
+    """Return the backend configured with `STATSD_BACKEND`
+
+    The backend is created once per process and shared by all threads.
+    """
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.STATSD_BACKEND)()
+    return _backend
@@ -0,0 +1,26 @@
+class BaseBackend(object):
+    """The interface between the django_statsd clients and a metrics system
+
+    All names are complete dotted metric names including the
+    `STATSD_PREFIX`. Backends must be thread safe.
+    """
+
+    def counter(self, name, value):
+        raise NotImplementedError("Subclasses must define a `counter` function")
+
+    def timer(self, name, ms):
+        raise NotImplementedError("Subclasses must define a `timer` function")
+
+    def histogram(self, name, value):
+        # A distribution of values which are not durations (sizes, counts),
+        # most backends handle them just like timers
+        return self.timer(name, value)
+
+    def gauge(self, name, value):
+        raise NotImplementedError("Subclasses must define a `gauge` function")
+
+    def set(self, name, value):
+        raise NotImplementedError("Subclasses must define a `set` function")
+
+    def flush(self):
+        pass
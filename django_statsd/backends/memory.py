@@ -0,0 +1,54 @@
+import threading
+import collections
+
+from django_statsd.backends import base
+
+
+class MemoryBackend(base.BaseBackend):
+    """Aggregate all metrics in memory, useful for tests and debugging
+
+    Counters are summed, timers and histograms keep every value, gauges keep
+    the last value and sets keep the unique members.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = collections.defaultdict(int)
+            self.timers = collections.defaultdict(list)
+            self.histograms = collections.defaultdict(list)
+            self.gauges = {}
+            self.sets = collections.defaultdict(set)
+
+    def counter(self, name, value):
+        with self.lock:
+            self.counters[name] += value
+
+    def timer(self, name, ms):
+        with self.lock:
+            self.timers[name].append(ms)
+
+    def histogram(self, name, value):
+        with self.lock:
+            self.histograms[name].append(value)
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def set(self, name, value):
+        with self.lock:
+            self.sets[name].add(value)
+
+    def keys(self):
+        with self.lock:
+            return (
+                set(self.counters)
+                | set(self.timers)
+                | set(self.histograms)
+                | set(self.gauges)
+                | set(self.sets)
+            )
@@ -0,0 +1,113 @@
+import re
+import bisect
+import threading
+import collections
+
+from django import http
+
+from django_statsd import settings
+from django_statsd.backends import base, get_backend
+
+_invalid_chars = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(name):
+    name = _invalid_chars.sub("_", name)
+    if name[:1].isdigit():
+        name = "_" + name
+    return name
+
+
+class Histogram(object):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name):
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append('%s_bucket{le="%s"} %d' % (name, bucket, cumulative))
+        cumulative += self.counts[-1]
+        lines.append('%s_bucket{le="+Inf"} %d' % (name, cumulative))
+        lines.append("%s_sum %s" % (name, self.sum))
+        lines.append("%s_count %d" % (name, cumulative))
+        return lines
+
+
+class PrometheusBackend(base.BaseBackend):
+    """Aggregate the metrics in-process for the Prometheus `metrics` view
+
+    Timers become histograms with `STATSD_PROMETHEUS_BUCKETS` (in ms) and
+    histograms of other values use powers of 4. Sets are exposed as a gauge
+    with the number of unique members. Every process has its own registry,
+    so this works best with a single (multithreaded) process per target.
+    """
+
+    value_buckets = tuple(4**i for i in range(16))
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(int)
+        self.gauges = {}
+        self.histograms = {}
+        self.sets = collections.defaultdict(set)
+
+    def counter(self, name, value):
+        with self.lock:
+            self.counters[metric_name(name)] += value
+
+    def observe(self, name, value, buckets):
+        name = metric_name(name)
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def timer(self, name, ms):
+        self.observe(name, ms, settings.STATSD_PROMETHEUS_BUCKETS)
+
+    def histogram(self, name, value):
+        self.observe(name, value, self.value_buckets)
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[metric_name(name)] = value
+
+    def set(self, name, value):
+        with self.lock:
+            self.sets[metric_name(name)].add(value)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append("# TYPE %s counter" % name)
+                lines.append("%s %d" % (name, value))
+            for name, value in sorted(self.gauges.items()):
+                lines.append("# TYPE %s gauge" % name)
+                lines.append("%s %s" % (name, value))
+            for name, members in sorted(self.sets.items()):
+                lines.append("# TYPE %s gauge" % name)
+                lines.append("%s %d" % (name, len(members)))
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append("# TYPE %s histogram" % name)
+                lines.extend(histogram.render(name))
+        return "\n".join(lines) + "\n"
+
+
+def metrics(request):
+    backend = get_backend()
+    if not isinstance(backend, PrometheusBackend):
+        raise http.Http404("STATSD_BACKEND is not the PrometheusBackend")
+
+    return http.HttpResponse(
+        backend.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,31 @@
+from __future__ import absolute_import
+
+from django_statsd import utils
+from django_statsd.backends import base
+
+
+class StatsdBackend(base.BaseBackend):
+    """Send every metric as a statsd UDP packet
+
+    Uses `STATSD_HOST`, `STATSD_PORT` and `STATSD_SAMPLE_RATE`. A single
+    connection (and socket) is shared by the whole process.
+    """
+
+    def __init__(self, connection=None):
+        self.connection = connection or utils.get_connection()
+
+    def counter(self, name, value):
+        self.connection.send({name: "%d|c" % value})
+
+    def timer(self, name, ms):
+        self.connection.send({name: "%0.08f|ms" % ms})
+
+    def gauge(self, name, value):
+        if value < 0:
+            # A leading sign is read as a change of the current value, so a
+            # negative value has to be set relative to zero
+            self.connection.send({name: "0|g"})
+        self.connection.send({name: "%s|g" % value})
+
+    def set(self, name, value):
+        self.connection.send({name: "%s|s" % value})
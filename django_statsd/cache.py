@@ -0,0 +1,123 @@
+from __future__ import absolute_import
+import pickle
+import django_statsd
+from django_statsd import middleware
+
+try:
+    from django.core import cache
+
+    _missing = object()
+    _classes = {}
+
+    class StatsdCacheMixin(object):
+        statsd_alias = "default"
+        # Backends such as `BaseCache.get_many` call `get` internally, only
+        # the outermost call is measured to prevent double counting
+        statsd_depth = 0
+
+        def statsd_call(self, operation, f, *args, **kwargs):
+            if self.statsd_depth:
+                return f(*args, **kwargs)
+
+            self.statsd_depth += 1
+            try:
+                with django_statsd.with_(
+                    "cache.%s.%s" % (self.statsd_alias, operation), detail=True
+                ):
+                    return f(*args, **kwargs)
+            finally:
+                self.statsd_depth -= 1
+
+        def get(self, key, default=None, version=None):
+            if self.statsd_depth:
+                return super(StatsdCacheMixin, self).get(key, default, version)
+
+            value = self.statsd_call(
+                "get", super(StatsdCacheMixin, self).get, key, _missing, version
+            )
+            if value is _missing:
+                django_statsd.incr("cache.%s.miss" % self.statsd_alias)
+                return default
+
+            django_statsd.incr("cache.%s.hit" % self.statsd_alias)
+            return value
+
+        def get_many(self, keys, version=None):
+            if self.statsd_depth:
+                return super(StatsdCacheMixin, self).get_many(keys, version)
+
+            keys = list(keys)
+            values = self.statsd_call(
+                "get_many", super(StatsdCacheMixin, self).get_many, keys, version
+            )
+
+            prefix = "cache.%s" % self.statsd_alias
+            django_statsd.incr("%s.hit" % prefix, len(values))
+            django_statsd.incr("%s.miss" % prefix, len(keys) - len(values))
+            django_statsd.observe("%s.get_many.keys" % prefix, len(keys))
+            # Measuring the size pickles every value again, like the other
+            # detailed timers it is skipped when over the overhead budget
+            if middleware.detailed():
+                for value in values.values():
+                    django_statsd.observe(
+                        "%s.get_many.size" % prefix, value_size(value)
+                    )
+            return values
+
+        def set(self, *args, **kwargs):
+            return self.statsd_call(
+                "set", super(StatsdCacheMixin, self).set, *args, **kwargs
+            )
+
+        def add(self, *args, **kwargs):
+            return self.statsd_call(
+                "add", super(StatsdCacheMixin, self).add, *args, **kwargs
+            )
+
+        def delete(self, *args, **kwargs):
+            return self.statsd_call(
+                "delete", super(StatsdCacheMixin, self).delete, *args, **kwargs
+            )
+
+        def set_many(self, *args, **kwargs):
+            return self.statsd_call(
+                "set_many", super(StatsdCacheMixin, self).set_many, *args, **kwargs
+            )
+
+        def delete_many(self, *args, **kwargs):
+            return self.statsd_call(
+                "delete_many",
+                super(StatsdCacheMixin, self).delete_many,
+                *args,
+                **kwargs
+            )
+
+    def value_size(value):
+        if isinstance(value, (bytes, str)):
+            return len(value)
+        try:
+            return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
+
+    def statsd_cache_class(class_):
+        # Subclass the configured backend so `isinstance` checks keep working
+        if class_ not in _classes:
+            _classes[class_] = type(
+                "Statsd%s" % class_.__name__, (StatsdCacheMixin, class_), {}
+            )
+        return _classes[class_]
+
+    def create_connection(self, alias):
+        backend = origCreateConnection(self, alias)
+        backend.__class__ = statsd_cache_class(backend.__class__)
+        backend.statsd_alias = alias
+        return backend
+
+    origCreateConnection = None
+    if not hasattr(cache.CacheHandler, "statsd_patched"):
+        cache.CacheHandler.statsd_patched = True
+        origCreateConnection = cache.CacheHandler.create_connection
+        cache.CacheHandler.create_connection = create_connection
+except ImportError:
+    pass
@@ -0,0 +1,146 @@
+"""Bound the number of distinct values used as metric path segments
+
+View names, redis commands, celery tasks and template names all end up in
+the metric names. Every namespace gets a `KeyGuard` which only lets a limited
+number of distinct keys through, everything beyond the limit is reported as
+`other` and counted in `statsd.cardinality_overflow.<namespace>`. Keys
+evicted by the `lru` policy are counted in
+`statsd.cardinality_evicted.<namespace>`.
+"""
+
+import time
+import threading
+import collections
+
+from . import backends
+from . import settings
+
+OTHER = "other"
+
+
+class KeyGuard(object):
+    """Registry of the keys seen for a single namespace
+
+    With the `first` policy the first `limit` keys are kept forever. With the
+    `lru` policy a new key replaces the least recently used key once the
+    limit is reached so the set of active keys can change over time. At most
+    `limit` new keys are let in per `interval` seconds, later new keys are
+    reported as `other` until the next interval. That way at most twice the
+    limit distinct keys are used per interval.
+
+    >>> guard = KeyGuard("spam", 2)
+    >>> guard("a"), guard("b"), guard("c"), guard("a")
+    ('a', 'b', 'other', 'a')
+    """
+
+    def __init__(self, namespace, limit, policy="first", interval=3600):
+        if policy not in ("first", "lru"):
+            raise ValueError("Unknown cardinality policy %r" % policy)
+
+        self.namespace = namespace
+        self.limit = limit
+        self.policy = policy
+        self.interval = interval
+        self.lock = threading.Lock()
+        if policy == "lru":
+            self.keys = collections.OrderedDict()
+            self.interval_started = time.monotonic()
+            self.admitted = 0
+        else:
+            self.keys = set()
+
+    def __call__(self, key):
+        if self.policy == "first":
+            # The hot path, a single set lookup without locking
+            if key in self.keys:
+                return key
+
+            with self.lock:
+                if len(self.keys) < self.limit:
+                    self.keys.add(key)
+                    return key
+            overflow(self.namespace)
+            return OTHER
+
+        with self.lock:
+            if key in self.keys:
+                self.keys.move_to_end(key)
+                return key
+
+            now = time.monotonic()
+            if now - self.interval_started >= self.interval:
+                self.interval_started = now
+                self.admitted = 0
+
+            admit = self.admitted < self.limit
+            if admit:
+                self.admitted += 1
+                self.keys[key] = True
+                evicted = len(self.keys) > self.limit
+                if evicted:
+                    self.keys.popitem(last=False)
+
+        if not admit:
+            overflow(self.namespace)
+            return OTHER
+        if evicted:
+            # The new key was let in, so this is not an overflow
+            count("cardinality_evicted", self.namespace)
+        return key
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def overflow(namespace):
+    count("cardinality_overflow", namespace)
+
+
+def count(metric, namespace):
+    name = "statsd.%s.%s" % (metric, namespace)
+    if settings.STATSD_PREFIX:
+        name = "%s.%s" % (settings.STATSD_PREFIX, name)
+
+    backend = backends.get_backend()
+    backend.counter(name, 1)
+    backend.flush()
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(namespace):
+    """Return the guard for a namespace, `None` if it has no limit"""
+    try:
+        return _guards[namespace]
+    except KeyError:
+        pass
+
+    with _guards_lock:
+        if namespace not in _guards:
+            limit = settings.STATSD_CARDINALITY_LIMITS.get(namespace)
+            guard = None
+            if limit is not None:
+                guard = KeyGuard(
+                    namespace,
+                    limit,
+                    settings.STATSD_CARDINALITY_POLICY,
+                    settings.STATSD_CARDINALITY_INTERVAL,
+                )
+            _guards[namespace] = guard
+        return _guards[namespace]
+
+
+def guard(namespace, key):
+    """Return `key` if it is within the limits of `namespace`, else `other`"""
+    key_guard = get_guard(namespace)
+    if key_guard is None:
+        return key
+    return key_guard(key)
+
+
+def reset():
+    """Forget all keys seen so far, mostly useful for tests"""
+    with _guards_lock:
+        _guards.clear()
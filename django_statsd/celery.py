@@ -1,19 +1,175 @@
 from __future__ import absolute_import
-from django_statsd.middleware import StatsdMiddleware
+import time
+import functools
+
+from django_statsd.middleware import StatsdMiddleware, Distribution, Timer
 from django.core.cache import cache
 
+from . import cardinality
 from . import settings
 
+#: Custom message headers used to time canvases without a shared cache,
+#: the start of the workflow is passed on to every task it publishes
+ROOT_STARTED = "statsd_root_started"
+CHORD_STARTED = "statsd_chord_started"
+CHORD_MEMBERS = "statsd_chord_members"
+GROUP_STARTED = "statsd_group_started"
+GROUP_MEMBERS = "statsd_group_members"
+SENT = "statsd_sent"
+
 
 def generate_task_name(original_name, routing_key):
     if routing_key.endswith(".fifo"):
         routing_key = routing_key.split(".")[0]
 
-    return "{}.queue_{}".format(original_name, routing_key)
+    return cardinality.guard("celery", "{}.queue_{}".format(original_name, routing_key))
+
+
+def get_header(request, name):
+    """Return a custom header of a task request, eager tasks only have them in
+    `request.headers`"""
+    value = request.get(name)
+    if value is None and request.headers:
+        value = request.headers.get(name)
+    return value
+
+
+def stamp(headers, request=None, now=None):
+    """Add the canvas headers to the headers of a message being published,
+    `request` is the request of the task publishing the message"""
+    now = now or time.time()
+    headers.setdefault(SENT, now)
+    started = get_header(request, ROOT_STARTED) if request is not None else None
+    headers.setdefault(ROOT_STARTED, started or now)
+
+
+def track_canvas(task, finished=None):
+    """Send the canvas timings of a finished task
+
+    Tasks started by another task (chains, groups and callbacks) send the
+    time since the root of the workflow was published. The last member of a
+    group to finish sends the duration of the group and its number of
+    members, the finished members are counted in the cache as they can run
+    on any worker. Chord callbacks send the duration of the chord and its
+    number of members.
+    """
+    request = task.request
+    finished = finished or time.time()
+    name = cardinality.guard("celery", "canvas.%s" % task.name)
+
+    root_started = get_header(request, ROOT_STARTED)
+    if root_started and request.root_id and request.root_id != request.id:
+        timer = Timer("celery")
+        timer.add("elapsed", max(finished - root_started, 0))
+        timer.submit(name)
+
+    group_started = get_header(request, GROUP_STARTED)
+    members = get_header(request, GROUP_MEMBERS)
+    if group_started and members and request.group:
+        if finish_group(request.group, members):
+            timer = Timer("celery")
+            timer.add("group.duration", max(finished - group_started, 0))
+            timer.submit(name)
+
+            distribution = Distribution("celery")
+            distribution.add("group.members", members)
+            distribution.submit(name)
+
+    chord_started = get_header(request, CHORD_STARTED)
+    if chord_started:
+        timer = Timer("celery")
+        timer.add("chord.duration", max(finished - chord_started, 0))
+        sent = get_header(request, SENT)
+        if sent:
+            # Includes the header tasks and waiting for the chord unlock
+            timer.add("chord.header", max(sent - chord_started, 0))
+        timer.submit(name)
+
+        distribution = Distribution("celery")
+        distribution.add("chord.members", get_header(request, CHORD_MEMBERS) or 0)
+        distribution.submit(name)
+
+
+def finish_group(group_id, members):
+    """Count a finished member of a group, return whether it was the last"""
+    key = "statsd_group_%s" % group_id
+    cache.add(key, 0, settings.STATSD_CACHE_TIMEOUT)
+    try:
+        finished = cache.incr(key)
+    except ValueError:
+        # Expired in between
+        return False
+
+    if finished < members:
+        return False
+    cache.delete(key)
+    return True
+
+
+def track_beat(entry):
+    """Send how late beat sends a schedule entry"""
+    try:
+        remaining = entry.schedule.remaining_estimate(entry.last_run_at)
+    except Exception:
+        return
+
+    lag = max(-remaining.total_seconds(), 0)
+    name = cardinality.guard("celery", "beat.%s" % entry.name.replace(" ", "_"))
+    timer = Timer("celery")
+    timer.add("lag", lag)
+    timer.submit(name)
+    StatsdMiddleware.custom_event_counter("celery", "sent", name)
+
+
+def apply_entry_wrapper(f):
+    @functools.wraps(f)
+    def _apply_entry(self, entry, *args, **kwargs):
+        track_beat(entry)
+        return f(self, entry, *args, **kwargs)
+
+    return _apply_entry
+
+
+def chord_run_wrapper(f):
+    @functools.wraps(f)
+    def _run(self, header, body, *args, **kwargs):
+        headers = dict(body.options.get("headers") or {})
+        headers[CHORD_STARTED] = time.time()
+        headers[CHORD_MEMBERS] = len(header.tasks)
+        body.options["headers"] = headers
+        return f(self, header, body, *args, **kwargs)
+
+    return _run
+
+
+def add_headers(options, stamps):
+    headers = dict(options.get("headers") or {})
+    headers.update(stamps)
+    options["headers"] = headers
+
+
+def group_apply_async_wrapper(f):
+    @functools.wraps(f)
+    def _apply_async(self, *args, **options):
+        try:
+            stamps = {GROUP_STARTED: time.time(), GROUP_MEMBERS: len(self.tasks)}
+        except TypeError:
+            return f(self, *args, **options)
+
+        # The options of the group override those of the members, only
+        # headers passed to the group itself replace the member headers
+        if options.get("headers"):
+            add_headers(options, stamps)
+        else:
+            for task in self.tasks:
+                add_headers(task.options, stamps)
+        return f(self, *args, **options)
+
+    return _apply_async
 
 
 try:
-    from celery import signals
+    from celery import beat, canvas, current_task, signals
 
     def start(**kwargs):
         task = kwargs.get("task")
@@ -58,14 +214,18 @@ try:
                 queue,
             )
         )
-        StatsdMiddleware.scope.timings = None
+        StatsdMiddleware.finish()
+        if settings.STATSD_TRACK_CELERY_CANVAS:
+            track_canvas(task)
 
     def clear(**kwargs):
+        # The scope is left by `task_postrun`, which follows the failure
         StatsdMiddleware.fail(kwargs.get("name"))
-        StatsdMiddleware.scope.timings = None
 
     def sent(**kwargs):
         body = kwargs.get("headers")
+        if settings.STATSD_TRACK_CELERY_CANVAS:
+            stamp(body, current_task.request if current_task else None)
         StatsdMiddleware.custom_event_counter(
             "celery",
             "sent",
@@ -82,5 +242,24 @@ try:
     signals.task_postrun.connect(stop)
     signals.task_failure.connect(clear)
 
+    def patch():
+        """Instrument the beat scheduler and chords, called on import when
+        `STATSD_TRACK_CELERY_BEAT` or `STATSD_TRACK_CELERY_CANVAS` is
+        enabled"""
+        if settings.STATSD_TRACK_CELERY_BEAT and not hasattr(beat, "statsd_patched"):
+            beat.statsd_patched = True
+            beat.Scheduler.apply_entry = apply_entry_wrapper(beat.Scheduler.apply_entry)
+        if settings.STATSD_TRACK_CELERY_CANVAS and not hasattr(
+            canvas, "statsd_patched"
+        ):
+            canvas.statsd_patched = True
+            canvas._chord.run = chord_run_wrapper(canvas._chord.run)
+            canvas.group.apply_async = group_apply_async_wrapper(
+                canvas.group.apply_async
+            )
+
+    if settings.STATSD_TRACK_CELERY_BEAT or settings.STATSD_TRACK_CELERY_CANVAS:
+        patch()
+
 except ImportError:
     pass
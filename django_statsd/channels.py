@@ -0,0 +1,186 @@
+"""Instrument Django Channels consumers and channel layers
+
+Enabled with `STATSD_TRACK_CHANNELS`. Websocket and other consumer traffic
+never passes through `StatsdMiddleware`, instead every message dispatched to
+a consumer runs in its own scope so the sql, redis and custom timers used by
+the handler are sent as `channels.<consumer>.<handler>.<key>` (e.g.
+`channels.chat.consumers.ChatConsumer.websocket_receive.sql`). Next to the
+`total` time of the handler this sends:
+
+- `messages.received` and `received_size` for received websocket frames
+- `messages.sent` and `sent_size` for websocket frames sent by the handler
+- `channel_layer.send` and `channel_layer.group_send` timers of the channel
+  layer calls made by the handler. All channel layer calls are also sent per
+  layer alias as `channels.layer.<alias>.<operation>`
+- the number of open websocket connections per consumer as the
+  `process.channels.<consumer>.connections` gauge
+"""
+
+import time
+import functools
+import threading
+import collections
+
+from . import cardinality
+from . import process
+from .middleware import StatsdMiddleware, Timer, get_scope, incr, observe
+
+
+def get_name(consumer):
+    cls = consumer.__class__
+    return cardinality.guard("channels", "%s.%s" % (cls.__module__, cls.__name__))
+
+
+def get_size(message):
+    data = message.get("text")
+    if data is None:
+        data = message.get("bytes")
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    return len(data)
+
+
+class Connections(object):
+    """Counts the open websocket connections per consumer"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open = collections.defaultdict(int)
+
+    def change(self, name, delta):
+        with self.lock:
+            self.open[name] = max(self.open[name] + delta, 0)
+            value = self.open[name]
+        process.gauge("channels.%s.connections" % name, value)
+
+
+connections = Connections()
+
+
+def track_message(name, message):
+    type_ = message.get("type")
+    if type_ == "websocket.connect":
+        connections.change(name, 1)
+    elif type_ == "websocket.disconnect":
+        connections.change(name, -1)
+    elif type_ == "websocket.receive":
+        incr("messages.received")
+        size = get_size(message)
+        if size is not None:
+            observe("received_size", size)
+
+
+def dispatch_wrapper(f):
+    @functools.wraps(f)
+    async def _dispatch(self, message):
+        # Messages dispatched while handling another one (e.g. by tests
+        # calling handlers directly) are part of that scope
+        if get_scope().timings:
+            return await f(self, message)
+
+        name = get_name(self)
+        key = (name, consumer.get_handler_name(message))
+        StatsdMiddleware.start("channels")
+        track_message(name, message)
+        try:
+            return await f(self, message)
+        except exceptions.StopConsumer:
+            raise
+        except Exception:
+            incr("fail")
+            raise
+        finally:
+            # Also stopped when the consumer is cancelled (e.g. on shutdown)
+            # so the scope and memory tracer of the message are released
+            StatsdMiddleware.stop(*key)
+            StatsdMiddleware.finish()
+
+    return _dispatch
+
+
+def track_send(message):
+    if message.get("type") == "websocket.send":
+        incr("messages.sent")
+        size = get_size(message)
+        if size is not None:
+            observe("sent_size", size)
+
+
+def send_wrapper(f):
+    @functools.wraps(f)
+    def _send(self, message):
+        track_send(message)
+        return f(self, message)
+
+    return _send
+
+
+def async_send_wrapper(f):
+    @functools.wraps(f)
+    async def _send(self, message):
+        track_send(message)
+        return await f(self, message)
+
+    return _send
+
+
+def layer_wrapper(alias, operation, f):
+    @functools.wraps(f)
+    async def _layer(*args, **kwargs):
+        start = time.time()
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            delta = time.time() - start
+            timer = Timer("channels")
+            timer.add(operation, delta)
+            timer.submit("layer", alias)
+            timings = get_scope().timings
+            if timings:
+                timings.add("channel_layer.%s" % operation, delta)
+
+    return _layer
+
+
+def make_backend_wrapper(f):
+    @functools.wraps(f)
+    def _make_backend(self, name):
+        layer = f(self, name)
+        for operation in ("send", "group_send"):
+            method = getattr(layer, operation, None)
+            if method is not None:
+                setattr(layer, operation, layer_wrapper(name, operation, method))
+        return layer
+
+    return _make_backend
+
+
+try:
+    from channels import consumer
+    from channels import exceptions
+    from channels import layers
+
+    def patch():
+        """Instrument the consumers and channel layers, called from the app
+        config when `STATSD_TRACK_CHANNELS` is enabled"""
+        if hasattr(consumer, "statsd_patched"):
+            return
+
+        consumer.statsd_patched = True
+        consumer.AsyncConsumer.dispatch = dispatch_wrapper(
+            consumer.AsyncConsumer.dispatch
+        )
+        # Runs the handlers in a thread, the scope follows `sync_to_async`
+        consumer.SyncConsumer.dispatch = dispatch_wrapper(
+            consumer.SyncConsumer.dispatch
+        )
+        consumer.AsyncConsumer.send = async_send_wrapper(consumer.AsyncConsumer.send)
+        consumer.SyncConsumer.send = send_wrapper(consumer.SyncConsumer.send)
+        layers.ChannelLayerManager.make_backend = make_backend_wrapper(
+            layers.ChannelLayerManager.make_backend
+        )
+
+except ImportError:
+    pass
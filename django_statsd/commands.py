@@ -0,0 +1,197 @@
+"""Instrument management commands like requests
+
+Enabled with `STATSD_TRACK_COMMANDS`. Every management command (except
+`STATSD_COMMANDS_EXCLUDE`) runs in its own scope so the sql, redis, json,
+template and custom timers used by the command are sent just like for a
+view, prefixed with `command.<name>`. Next to those every command sends:
+
+- `total` and `cpu`: the wall clock and CPU time of the command
+- `exit.<status>`: a counter of the exit status, `0` when the command
+  succeeded, the `returncode` of a `CommandError` and `1` for other errors
+
+Long running commands (e.g. queue consumers) send the metrics collected so
+far every `STATSD_COMMANDS_FLUSH_INTERVAL` seconds instead of only on exit.
+"""
+
+import copy
+import time
+import functools
+import threading
+import collections
+
+from . import memory
+from . import sampler
+from . import settings
+from .middleware import StatsdMiddleware
+
+
+def get_name(command):
+    """Return the name of a command, the module it was loaded from"""
+    return command.__module__.rpartition(".")[2]
+
+
+def exit_status(exception):
+    if exception is None:
+        return 0
+    if isinstance(exception, SystemExit):
+        code = exception.code
+        if code is None or isinstance(code, int):
+            return code or 0
+        return 1
+    return getattr(exception, "returncode", 1)
+
+
+def detach(client, *names):
+    """Return a copy of `client` holding its current data
+
+    The data of `client` is replaced by empty containers, so the command
+    thread keeps writing to new ones while the copy is submitted.
+    """
+    detached = copy.copy(client)
+    for name in names:
+        data = getattr(client, name)
+        if isinstance(data, collections.defaultdict):
+            setattr(client, name, collections.defaultdict(data.default_factory))
+        else:
+            setattr(client, name, {})
+    return detached
+
+
+class CommandScope(object):
+    """The metrics of a running command
+
+    The scope of the middleware is local to the thread running the command,
+    so the clients of the command are kept here to be flushed from the
+    flusher thread.
+    """
+
+    def __init__(self, name, scope):
+        self.name = name
+        self.lock = threading.Lock()
+        self.timings = scope.timings
+        self.counter = scope.counter
+        self.counter_site = scope.counter_site
+        self.timings_site = scope.timings_site
+        self.distribution = scope.distribution
+        self.gauges = scope.gauges
+        self.sets = scope.sets
+        self.memory_traced = getattr(scope, "memory_traced", None)
+        self.memory_rss = getattr(scope, "memory_rss", None)
+        self.cpu = time.process_time()
+
+    def flush(self):
+        """Send the metrics collected so far, the running timers (like
+        `total`) are only sent when the command exits"""
+        with self.lock:
+            # The detached timer has no running timers, which are only
+            # complete on exit
+            timings = detach(self.timings, "data", "exclusive")
+            timings.starts = collections.defaultdict(collections.deque)
+            clients = (
+                timings,
+                detach(self.counter, "data"),
+                detach(self.distribution, "data"),
+                detach(self.gauges, "data"),
+                detach(self.sets, "data"),
+            )
+            for client in clients:
+                client.submit(self.name)
+
+    def stop(self, status):
+        with self.lock:
+            self.timings.stop("total")
+            self.timings.add("cpu", time.process_time() - self.cpu)
+            self.counter.increment("exit.%s" % status)
+            if status:
+                self.counter.increment("fail")
+            memory.stop_request(self)
+
+            for client in (
+                self.timings,
+                self.counter,
+                self.distribution,
+                self.gauges,
+                self.sets,
+            ):
+                client.submit(self.name)
+            self.counter_site.submit("site")
+            self.timings_site.submit("site")
+
+
+class CommandFlusher(sampler.PeriodicSampler):
+    """Periodically flushes the metrics of the running commands"""
+
+    name = "statsd-commands"
+
+    def __init__(self, interval):
+        sampler.PeriodicSampler.__init__(self, interval)
+        self.lock = threading.Lock()
+        self.running = {}
+
+    def after_fork(self):
+        sampler.PeriodicSampler.after_fork(self)
+        self.lock = threading.Lock()
+        # The commands of the parent don't run in the child
+        self.running = {}
+
+    def add(self, command):
+        with self.lock:
+            self.running[id(command)] = command
+        self.ensure_running()
+
+    def remove(self, command):
+        with self.lock:
+            self.running.pop(id(command), None)
+
+    def sample(self):
+        with self.lock:
+            commands = list(self.running.values())
+        for command in commands:
+            command.flush()
+
+
+flusher = CommandFlusher(settings.STATSD_COMMANDS_FLUSH_INTERVAL)
+
+
+def execute_wrapper(f):
+    @functools.wraps(f)
+    def _execute(self, *args, **options):
+        name = get_name(self)
+        # Commands called from a request, task or another command are part
+        # of that scope
+        if name in settings.STATSD_COMMANDS_EXCLUDE or getattr(
+            StatsdMiddleware.scope, "timings", None
+        ):
+            return f(self, *args, **options)
+
+        command = CommandScope(name, StatsdMiddleware.start("command"))
+        if settings.STATSD_COMMANDS_FLUSH_INTERVAL:
+            flusher.add(command)
+        exception = None
+        try:
+            return f(self, *args, **options)
+        except BaseException as e:
+            exception = e
+            raise
+        finally:
+            flusher.remove(command)
+            command.stop(exit_status(exception))
+            StatsdMiddleware.finish()
+
+    return _execute
+
+
+try:
+    from django.core.management import base
+
+    def patch():
+        """Instrument `BaseCommand.execute`, called from the app config when
+        `STATSD_TRACK_COMMANDS` is enabled"""
+        if hasattr(base, "statsd_patched"):
+            return
+
+        base.statsd_patched = True
+        base.BaseCommand.execute = execute_wrapper(base.BaseCommand.execute)
+
+except ImportError:
+    pass
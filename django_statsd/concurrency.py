@@ -0,0 +1,73 @@
+import time
+import threading
+
+from . import backends
+from . import sampler
+from . import settings
+
+
+class ConcurrencyTracker(sampler.PeriodicSampler):
+    """Keeps track of the requests in flight within this process
+
+    Every interval the current and peak number of requests in flight are
+    sent as gauges, together with the average concurrency and the
+    utilization (average concurrency divided by the number of worker
+    threads).
+    """
+
+    name = "statsd-concurrency"
+
+    def __init__(self, interval, threads=1, prefix="process"):
+        sampler.PeriodicSampler.__init__(self, interval)
+        if settings.STATSD_PREFIX:
+            prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
+        self.prefix = prefix
+        self.threads = threads
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.peak = 0
+        # The number of request seconds since the last sample
+        self.load = 0.0
+        self.changed = self.sampled = time.monotonic()
+
+    def update(self, now):
+        self.load += (now - self.changed) * self.inflight
+        self.changed = now
+
+    def enter(self):
+        self.ensure_running()
+        with self.lock:
+            self.update(time.monotonic())
+            self.inflight += 1
+            if self.inflight > self.peak:
+                self.peak = self.inflight
+
+    def leave(self):
+        with self.lock:
+            self.update(time.monotonic())
+            self.inflight -= 1
+
+    def sample(self):
+        with self.lock:
+            now = time.monotonic()
+            self.update(now)
+            elapsed = (now - self.sampled) or 1.0
+            current = self.inflight
+            peak = self.peak
+            average = self.load / elapsed
+
+            self.peak = self.inflight
+            self.load = 0.0
+            self.sampled = now
+
+        backend = backends.get_backend()
+        backend.gauge(self.prefix + ".concurrency.current", current)
+        backend.gauge(self.prefix + ".concurrency.peak", peak)
+        backend.gauge(self.prefix + ".concurrency.average", round(average, 4))
+        backend.gauge(self.prefix + ".utilization", round(average / self.threads, 4))
+        backend.flush()
+
+
+tracker = ConcurrencyTracker(
+    settings.STATSD_CONCURRENCY_INTERVAL, settings.STATSD_WORKER_THREADS
+)
@@ -1,12 +1,137 @@
 from __future__ import with_statement
+import time
+import functools
+
 import django_statsd
+from django_statsd.middleware import get_scope
 
 
 class TimingCursorWrapper(object):
     def execute(self, *args, **kwargs):
-        with django_statsd.with_("sql.%s" % self.db.alias):
+        with django_statsd.with_("sql.%s" % self.db.alias, detail=True):
             return self.cursor.execute(*args, **kwargs)
 
     def executemany(self, *args, **kwargs):
-        with django_statsd.with_("sql.%s" % self.db.alias):
+        with django_statsd.with_("sql.%s" % self.db.alias, detail=True):
             return self.cursor.executemany(*args, **kwargs)
+
+
+def connect_wrapper(f):
+    @functools.wraps(f)
+    def _connect(self, *args, **kwargs):
+        with django_statsd.with_("db.%s.connect" % self.alias):
+            return f(self, *args, **kwargs)
+
+    return _connect
+
+
+def cursor_wrapper(f):
+    @functools.wraps(f)
+    def _cursor(self, *args, **kwargs):
+        counter = get_scope().counter
+        if counter is None or self.connection is None:
+            # New connections are counted by `connection_created`
+            return f(self, *args, **kwargs)
+
+        # Count the reuse of an existing connection once per request
+        new = "db.%s.connection.new" % self.alias
+        reused = "db.%s.connection.reused" % self.alias
+        if new not in counter.data and reused not in counter.data:
+            counter.increment(reused)
+        return f(self, *args, **kwargs)
+
+    return _cursor
+
+
+def connection_created(sender, connection, **kwargs):
+    django_statsd.incr("db.%s.connection.new" % connection.alias)
+
+
+def atomic_enter_wrapper(f):
+    @functools.wraps(f)
+    def _enter(self):
+        connection = transaction.get_connection(self.using)
+        outermost = not connection.in_atomic_block
+        savepoints = len(connection.savepoint_ids)
+        started = time.time()
+        f(self)
+
+        # A stack as the same `Atomic` can be nested when used as decorator
+        stack = connection.__dict__.setdefault("statsd_atomic", [])
+        stack.append((outermost, started))
+        # `atomic(savepoint=False)` pushes `None` instead of a savepoint
+        if (
+            not outermost
+            and len(connection.savepoint_ids) > savepoints
+            and connection.savepoint_ids[-1] is not None
+        ):
+            django_statsd.incr("db.%s.savepoint.created" % connection.alias)
+
+    return _enter
+
+
+def atomic_exit_wrapper(f):
+    @functools.wraps(f)
+    def _exit(self, exc_type, exc_value, traceback):
+        connection = transaction.get_connection(self.using)
+        stack = connection.__dict__.get("statsd_atomic")
+        if not stack:
+            return f(self, exc_type, exc_value, traceback)
+
+        outermost, started = stack.pop()
+        prefix = "db.%s" % connection.alias
+        if not outermost:
+            if (
+                exc_type is not None
+                and connection.savepoint_ids
+                and connection.savepoint_ids[-1] is not None
+            ):
+                django_statsd.incr(prefix + ".savepoint.rollback")
+            return f(self, exc_type, exc_value, traceback)
+
+        if exc_type is None and not connection.needs_rollback:
+            action = "commit"
+        else:
+            action = "rollback"
+
+        try:
+            with django_statsd.with_("%s.transaction.%s" % (prefix, action)):
+                return f(self, exc_type, exc_value, traceback)
+        finally:
+            django_statsd.observe(
+                prefix + ".transaction.duration", (time.time() - started) * 1000
+            )
+
+    return _exit
+
+
+try:
+    from django.db import transaction
+    from django.db.backends import signals
+    from django.db.backends.base import base
+
+    def patch():
+        """Instrument the connections and transactions of all databases
+
+        Called from the app config when `STATSD_TRACK_DATABASE` is enabled.
+        """
+        if hasattr(base, "statsd_patched"):
+            return
+
+        base.statsd_patched = True
+        base.BaseDatabaseWrapper.connect = connect_wrapper(
+            base.BaseDatabaseWrapper.connect
+        )
+        base.BaseDatabaseWrapper._cursor = cursor_wrapper(
+            base.BaseDatabaseWrapper._cursor
+        )
+        transaction.Atomic.__enter__ = atomic_enter_wrapper(
+            transaction.Atomic.__enter__
+        )
+        transaction.Atomic.__exit__ = atomic_exit_wrapper(transaction.Atomic.__exit__)
+        signals.connection_created.connect(
+            connection_created, dispatch_uid="django_statsd.database"
+        )
+
+except ImportError:
+    pass
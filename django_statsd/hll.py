@@ -0,0 +1,101 @@
+import math
+
+MASK = (1 << 64) - 1
+_powers = [2.0**-i for i in range(66)]
+
+
+def hash64(value):
+    # Python's `hash()` is fast and stable within a process but returns the
+    # value itself for small integers, the splitmix64 finalizer spreads the
+    # bits over the full 64 bit range
+    h = (hash(value) + 0x9E3779B97F4A7C15) & MASK
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK
+    return h ^ (h >> 31)
+
+
+class HyperLogLog(object):
+    """Estimate the number of unique values using bounded memory
+
+    Uses `2 ** precision` one byte registers giving a standard error of
+    `1.04 / sqrt(2 ** precision)` (1.6% for the default of 12). Sets of up
+    to `2 ** precision / 8` values (512 by default) are counted exactly using
+    a set of their hashes. At that size the set uses several times the
+    memory of the registers, but it is short lived and small counts are
+    common.
+
+    >>> hll = HyperLogLog()
+    >>> for i in range(100):
+    ...     hll.add(i % 10)
+    >>> len(hll)
+    10
+    """
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.rank_bits = 64 - precision
+        self.rank_mask = (1 << self.rank_bits) - 1
+        # Exact set of hashes until it grows too large
+        self.hashes = set()
+        self.registers = None
+
+        if self.m >= 128:
+            self.alpha = 0.7213 / (1 + 1.079 / self.m)
+        else:
+            self.alpha = {16: 0.673, 32: 0.697, 64: 0.709}[self.m]
+
+    def add(self, value):
+        h = hash64(value)
+        if self.registers is None:
+            self.hashes.add(h)
+            if len(self.hashes) > self.m // 8:
+                self.densify()
+        else:
+            self.add_hash(h)
+
+    def add_hash(self, h):
+        index = h >> self.rank_bits
+        rank = self.rank_bits - (h & self.rank_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def densify(self):
+        self.registers = bytearray(self.m)
+        for h in self.hashes:
+            self.add_hash(h)
+        self.hashes = None
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Unable to merge HyperLogLogs of different precision")
+
+        if other.registers is None:
+            for h in other.hashes:
+                if self.registers is None:
+                    self.hashes.add(h)
+                else:
+                    self.add_hash(h)
+            if self.registers is None and len(self.hashes) > self.m // 8:
+                self.densify()
+        else:
+            if self.registers is None:
+                self.densify()
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        if self.registers is None:
+            return len(self.hashes)
+
+        m = self.m
+        estimate = self.alpha * m * m / sum(map(_powers.__getitem__, self.registers))
+        if estimate <= 2.5 * m:
+            # Small range correction using linear counting
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / float(zeros))
+        return int(round(estimate))
+
+    __len__ = count
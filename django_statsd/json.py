@@ -6,10 +6,10 @@ try:
 
     if not hasattr(json, "statsd_patched"):
         json.statsd_patched = True
-        json.load = django_statsd.wrapper("json", json.load)
-        json.loads = django_statsd.wrapper("json", json.loads)
-        json.dump = django_statsd.wrapper("json", json.dump)
-        json.dumps = django_statsd.wrapper("json", json.dumps)
+        json.load = django_statsd.wrapper("json", json.load, detail=True)
+        json.loads = django_statsd.wrapper("json", json.loads, detail=True)
+        json.dump = django_statsd.wrapper("json", json.dump, detail=True)
+        json.dumps = django_statsd.wrapper("json", json.dumps, detail=True)
 except ImportError:
     pass
 
@@ -18,7 +18,7 @@ try:
 
     if not hasattr(json, "statsd_patched"):
         cjson.statsd_patched = True
-        cjson.encode = django_statsd.wrapper("cjson", cjson.encode)
-        cjson.decode = django_statsd.wrapper("cjson", cjson.decode)
+        cjson.encode = django_statsd.wrapper("cjson", cjson.encode, detail=True)
+        cjson.decode = django_statsd.wrapper("cjson", cjson.decode, detail=True)
 except ImportError:
     pass
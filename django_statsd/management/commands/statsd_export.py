@@ -0,0 +1,42 @@
+import sys
+import json
+
+from django.core.management.base import BaseCommand
+
+from django_statsd import recorder
+
+
+class Command(BaseCommand):
+    help = "Export a ring file written with STATSD_RECORDING_FILE"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The ring file to export")
+        parser.add_argument(
+            "--format",
+            choices=("summary", "csv", "json"),
+            default="summary",
+            help="Export all records as csv/json or the percentiles per key",
+        )
+        parser.add_argument(
+            "--output", help="Write to this file instead of standard output"
+        )
+
+    def handle(self, *args, **options):
+        reader = recorder.RingReader(options["path"])
+        if options["output"]:
+            fh = open(options["output"], "w", newline="")
+        else:
+            fh = sys.stdout
+
+        try:
+            if options["format"] == "csv":
+                reader.export_csv(fh)
+            elif options["format"] == "json":
+                reader.export_json(fh)
+            else:
+                json.dump(reader.summary(), fh, indent=2, sort_keys=True)
+                fh.write("\n")
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
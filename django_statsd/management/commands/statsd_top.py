@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import select
+import socket
+import collections
+
+from django.core.management.base import BaseCommand
+
+from django_statsd import settings
+
+
+class ViewStats(object):
+    def __init__(self, samples=1000):
+        self.count = 0
+        self.received = 0
+        self.time = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=samples)
+        self.sql = 0.0
+        self.sql_count = 0
+        self.redis = 0.0
+        self.redis_count = 0
+
+    def percentile(self, percentile):
+        if not self.samples:
+            return 0.0
+        samples = sorted(self.samples)
+        return samples[min(int(len(samples) * percentile), len(samples) - 1)]
+
+    def summary(self, elapsed):
+        return dict(
+            count=self.count,
+            rate=self.count / elapsed if elapsed else 0.0,
+            mean=self.time / self.received if self.received else 0.0,
+            p95=self.percentile(0.95),
+            max=self.max,
+            sql_share=self.sql / self.time if self.time else 0.0,
+            sql_count=self.sql_count,
+            redis_share=self.redis / self.time if self.time else 0.0,
+            redis_count=self.redis_count,
+        )
+
+
+class Aggregator(object):
+    """Aggregates the statsd packets sent by the middleware per view
+
+    The timings of the sub keys (e.g. `sql.default`) of a request are sent
+    before its `total` so keys for views that have not been seen yet are kept
+    aside until the view is known.
+    """
+
+    def __init__(self, prefix="view", pending=10000):
+        if settings.STATSD_PREFIX:
+            prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
+        self.prefix = prefix + "."
+        self.views = collections.defaultdict(ViewStats)
+        self.pending = collections.deque(maxlen=pending)
+        self.started = time.time()
+        self.packets = 0
+        self.bytes = 0
+
+    def feed(self, packet):
+        self.packets += 1
+        self.bytes += len(packet)
+        for line in packet.decode("utf-8", "replace").splitlines():
+            self.parse(line)
+
+    def parse(self, line):
+        # name:value|type[|@sample_rate][|#tags]
+        name, _, rest = line.partition(":")
+        parts = rest.split("|")
+        if len(parts) < 2 or not name.startswith(self.prefix):
+            return
+
+        # Anyone can send packets to the port, malformed lines are skipped
+        rate = 1.0
+        try:
+            value = float(parts[0])
+            for part in parts[2:]:
+                if part.startswith("@"):
+                    rate = float(part[1:]) or 1.0
+        except ValueError:
+            return
+
+        if parts[1] == "ms":
+            self.add(name[len(self.prefix) :], value, rate)
+
+    def add(self, key, value, rate=1.0):
+        view, _, metric = key.rpartition(".")
+        if metric == "total":
+            # Every request sends exactly one `total`
+            if "." not in view:
+                return
+            stats = self.views[view]
+            # Sampled requests count for more than one
+            stats.count += int(round(1 / rate))
+            stats.received += 1
+            stats.time += value
+            stats.max = max(stats.max, value)
+            stats.samples.append(value)
+        elif not self.add_sub_key(key, value):
+            self.pending.append((key, value))
+
+    def add_sub_key(self, key, value):
+        view = key
+        while "." in view:
+            view, _, metric = view.rpartition(".")
+            stats = self.views.get(view)
+            if stats is None:
+                continue
+
+            metric = key[len(view) + 1 :]
+            if metric.startswith("sql."):
+                stats.sql += value
+                stats.sql_count += 1
+            elif metric.startswith("redis."):
+                stats.redis += value
+                stats.redis_count += 1
+            return True
+        return False
+
+    def resolve_pending(self):
+        pending = self.pending
+        self.pending = collections.deque(maxlen=pending.maxlen)
+        for key, value in pending:
+            if not self.add_sub_key(key, value):
+                self.pending.append((key, value))
+
+    def summary(self):
+        self.resolve_pending()
+        elapsed = time.time() - self.started
+        return dict(
+            elapsed=elapsed,
+            packets=self.packets,
+            bytes=self.bytes,
+            views=dict(
+                (view, stats.summary(elapsed)) for view, stats in self.views.items()
+            ),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Listen for the statsd packets sent by django_statsd and show the "
+        "slowest and busiest views"
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--host",
+            default=settings.STATSD_HOST,
+            help="Host to listen on, defaults to STATSD_HOST",
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=int(settings.STATSD_PORT),
+            help="UDP port to listen on, defaults to STATSD_PORT",
+        )
+        parser.add_argument(
+            "--socket", help="Listen on this unix datagram socket instead of UDP"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds between refreshes of the table",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Number of views per table"
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            help="Stop after this many seconds instead of running until Ctrl+C",
+        )
+        parser.add_argument(
+            "--json", dest="json_file", help="Write a JSON summary to this file at exit"
+        )
+
+    def handle(self, *args, **options):
+        sock = self.get_socket(options)
+        aggregator = Aggregator()
+        interval = options["interval"]
+        stop_at = None
+        if options["duration"]:
+            stop_at = time.time() + options["duration"]
+        refresh_at = time.time() + interval
+
+        try:
+            while stop_at is None or time.time() < stop_at:
+                wake_at = refresh_at if stop_at is None else min(refresh_at, stop_at)
+                timeout = max(wake_at - time.time(), 0)
+                if select.select([sock], [], [], timeout)[0]:
+                    aggregator.feed(sock.recv(65535))
+
+                if time.time() >= refresh_at:
+                    refresh_at = time.time() + interval
+                    self.show(aggregator.summary(), options["limit"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+            if options["socket"]:
+                os.unlink(options["socket"])
+
+        summary = aggregator.summary()
+        self.show(summary, options["limit"])
+        if options["json_file"]:
+            with open(options["json_file"], "w") as fh:
+                json.dump(summary, fh, indent=2, sort_keys=True)
+
+    def get_socket(self, options):
+        if options["socket"]:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(options["socket"])
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((options["host"], options["port"]))
+        return sock
+
+    def show(self, summary, limit):
+        if self.stdout.isatty():
+            self.stdout.write("\x1b[2J\x1b[H", ending="")
+
+        self.stdout.write(
+            "%(packets)d packets, %(bytes)d bytes in %(elapsed).0fs" % summary
+        )
+        views = summary["views"]
+        for title, sort_key in (("Slowest", "mean"), ("Busiest", "count")):
+            rows = sorted(views.items(), key=lambda v: v[1][sort_key], reverse=True)
+            self.stdout.write("")
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    "%-7s %8s %7s %9s %9s %9s %6s %6s %6s %7s  %s"
+                    % (
+                        title,
+                        "count",
+                        "req/s",
+                        "mean ms",
+                        "p95 ms",
+                        "max ms",
+                        "sql%",
+                        "sql n",
+                        "redis%",
+                        "redis n",
+                        "view",
+                    )
+                )
+            )
+            for view, stats in rows[:limit]:
+                self.stdout.write(
+                    "%-7s %8d %7.1f %9.1f %9.1f %9.1f %5.0f%% %6d %5.0f%% %7d  %s"
+                    % (
+                        "",
+                        stats["count"],
+                        stats["rate"],
+                        stats["mean"],
+                        stats["p95"],
+                        stats["max"],
+                        stats["sql_share"] * 100,
+                        stats["sql_count"],
+                        stats["redis_share"] * 100,
+                        stats["redis_count"],
+                        view,
+                    )
+                )
+        self.stdout.flush()
@@ -0,0 +1,176 @@
+"""Memory and garbage collection metrics
+
+- `STATSD_TRACK_MEMORY_RATE`: for this fraction of the requests
+  `tracemalloc` is enabled and the peak and net allocated memory of the
+  request are sent as `memory.peak` and `memory.allocated` (in bytes).
+  Tracing slows down all allocations of the process and the peak is shared
+  between threads, so keep the rate low.
+- `STATSD_TRACK_RSS`: the change of the resident set size during the request
+  is sent as `memory.rss_delta` (Linux only).
+- `STATSD_TRACK_GC`: the garbage collection pauses are added to the timings
+  of the request running in the thread that triggered the collection as
+  `gc.gen<generation>`. The pauses are also sent for the whole process as
+  `process.gc.gen<generation>` every `STATSD_PROCESS_INTERVAL` seconds.
+"""
+
+import os
+import gc
+import time
+import random
+import threading
+import tracemalloc
+import collections
+
+from . import backends
+from . import sampler
+from . import settings
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def get_rss():
+    """Return the resident set size in bytes, `None` if it is unknown"""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * PAGE_SIZE
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+
+class Tracer(object):
+    """Keeps `tracemalloc` running while at least one request needs it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+        self.started = False
+
+    def start(self):
+        with self.lock:
+            if not self.users and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started = True
+            self.users += 1
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, start):
+        with self.lock:
+            current, peak = tracemalloc.get_traced_memory()
+            self.users -= 1
+            if not self.users and self.started:
+                tracemalloc.stop()
+                self.started = False
+        return current - start, max(peak - start, 0)
+
+
+tracer = Tracer()
+
+
+def start_request(scope):
+    scope.memory_traced = None
+    scope.memory_rss = None
+    if settings.STATSD_TRACK_MEMORY_RATE and (
+        random.random() < settings.STATSD_TRACK_MEMORY_RATE
+    ):
+        scope.memory_traced = tracer.start()
+    if settings.STATSD_TRACK_RSS:
+        scope.memory_rss = get_rss()
+    if settings.STATSD_TRACK_GC:
+        if gc_monitor.scope is None:
+            from .middleware import StatsdMiddleware
+
+            # Collections are added to the scope of the thread they run in
+            gc_monitor.scope = StatsdMiddleware.scope
+        gc_monitor.ensure_running()
+
+
+def stop_request(scope):
+    start = getattr(scope, "memory_traced", None)
+    if start is not None:
+        scope.memory_traced = None
+        allocated, peak = tracer.stop(start)
+        scope.distribution.add("memory.allocated", allocated)
+        scope.distribution.add("memory.peak", peak)
+
+    rss = getattr(scope, "memory_rss", None)
+    if rss is not None:
+        scope.memory_rss = None
+        current = get_rss()
+        if current is not None:
+            scope.distribution.add("memory.rss_delta", current - rss)
+
+
+def release_request(scope):
+    """Stop tracing for a request that was never stopped (e.g. a 404 which
+    has no view name) so `tracemalloc` doesn't stay enabled"""
+    if getattr(scope, "memory_traced", None) is not None:
+        scope.memory_traced = None
+        tracer.stop(0)
+    scope.memory_rss = None
+
+
+class GCMonitor(sampler.PeriodicSampler):
+    """Measures the garbage collection pauses using `gc.callbacks`
+
+    The callback runs in the middle of an allocation so it must not take any
+    locks which might be held by the same thread, the pauses are collected
+    in plain dicts and sent from the background thread.
+    """
+
+    name = "statsd-gc"
+
+    def __init__(self, interval, prefix="process"):
+        sampler.PeriodicSampler.__init__(self, interval)
+        if settings.STATSD_PREFIX:
+            prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
+        self.prefix = prefix
+        # The scope of the middleware, set by `start_request`
+        self.scope = None
+        self.started = None
+        self.pauses = collections.defaultdict(float)
+        self.collections = collections.defaultdict(int)
+
+    def install(self):
+        if self.callback not in gc.callbacks:
+            gc.callbacks.append(self.callback)
+
+    def uninstall(self):
+        if self.callback in gc.callbacks:
+            gc.callbacks.remove(self.callback)
+
+    def callback(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+            return
+        if self.started is None:
+            return
+
+        delta = time.perf_counter() - self.started
+        self.started = None
+        key = "gc.gen%d" % info["generation"]
+        self.pauses[key] += delta
+        self.collections[key] += 1
+
+        timings = getattr(self.scope, "timings", None)
+        if timings:
+            timings.add(key, delta)
+
+    def sample(self):
+        pauses, self.pauses = self.pauses, collections.defaultdict(float)
+        counts, self.collections = self.collections, collections.defaultdict(int)
+
+        backend = backends.get_backend()
+        for key, delta in pauses.items():
+            backend.timer("%s.%s" % (self.prefix, key), delta * 1000)
+        for key, count in counts.items():
+            backend.counter("%s.%s.collections" % (self.prefix, key), count)
+        backend.flush()
+
+
+gc_monitor = GCMonitor(settings.STATSD_PROCESS_INTERVAL)
+if settings.STATSD_TRACK_GC:
+    gc_monitor.install()
@@ -1,17 +1,26 @@
 from __future__ import with_statement
 import time
+import random
+import inspect
 import logging
 import functools
-import threading
 import warnings
+import contextvars
 import collections
-import statsd
 
+from asgiref.sync import iscoroutinefunction
 from django.core import exceptions
 from django.utils.deprecation import MiddlewareMixin
 
-from . import utils
+from . import backends
+from . import cardinality
+from . import concurrency
+from . import hll
+from . import memory
+from . import overhead
+from . import profiler
 from . import settings
+from . import startup
 
 logger = logging.getLogger(__name__)
 
@@ -33,13 +42,48 @@ except exceptions.ImproperlyConfigured:
     MAKE_TAGS_LIKE = False
 
 
+def parse_request_start(value):
+    """Parse a `X-Request-Start` or `X-Queue-Start` header to a timestamp
+
+    Supports the `t=` prefix used by nginx and New Relic and timestamps in
+    seconds, milliseconds, microseconds and nanoseconds since the epoch.
+
+    >>> parse_request_start("t=1500000000.5")
+    1500000000.5
+    >>> parse_request_start("1500000000500")
+    1500000000.5
+    >>> parse_request_start("t=1500000000500000")
+    1500000000.5
+    >>> parse_request_start("spam")
+    """
+    value = value.strip()
+    if value.startswith("t="):
+        value = value[2:]
+
+    try:
+        timestamp = float(value)
+    except ValueError:
+        return None
+
+    # Detect the unit from the magnitude, the cutoffs are centuries apart
+    if timestamp > 1e17:
+        timestamp /= 1e9
+    elif timestamp > 1e14:
+        timestamp /= 1e6
+    elif timestamp > 1e11:
+        timestamp /= 1e3
+    return timestamp
+
+
 class WithTimer(object):
     def __init__(self, timer, key):
         self.timer = timer
         self.key = key
 
     def __enter__(self):
+        started = time.perf_counter()
         self.timer.start(self.key)
+        add_overhead(self.timer, started)
 
     def __exit__(
         self,
@@ -47,30 +91,33 @@ class WithTimer(object):
         value,
         traceback,
     ):
+        started = time.perf_counter()
         self.timer.stop(self.key)
+        add_overhead(self.timer, started)
 
+    async def __aenter__(self):
+        self.__enter__()
+
+    async def __aexit__(self, type_, value, traceback):
+        self.__exit__(type_, value, traceback)
 
-class Client(object):
-    class_ = statsd.Client
 
+class Client(object):
     def __init__(self, prefix="view"):
         if settings.STATSD_PREFIX:
             prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
         self.prefix = prefix
         self.data = collections.defaultdict(int)
 
-    def get_client(self, *args):
+    def get_name(self, *args):
         args = [self.prefix] + list(args)
-        prefix = ".".join(a for a in args if a)
-        return utils.get_client(prefix, class_=self.class_)
+        return ".".join(a for a in args if a)
 
     def submit(self, *args):
         raise NotImplementedError("Subclasses must define a `submit` function")
 
 
 class Counter(Client):
-    class_ = statsd.Counter
-
     def increment(self, key, delta=1):
         self.data[key] += delta
 
@@ -78,40 +125,83 @@ class Counter(Client):
         self.data[key] -= delta
 
     def submit(self, *args):
-        client = self.get_client(*args)
+        backend = backends.get_backend()
+        name = self.get_name(*args)
         for k, v in self.data.items():
             if v:
-                client.increment(k, v)
+                backend.counter("%s.%s" % (name, k), v)
+        backend.flush()
 
 
 class Timer(Client):
-    class_ = statsd.Timer
+    """Accumulates the (inclusive) time spent per key
 
-    def __init__(self, prefix="view"):
+    With `spans` enabled the timer also keeps a stack of the running keys so
+    the time spent in nested keys can be subtracted. The exclusive time of
+    every key is sent as `self.<key>` and the time of `total` that is not
+    covered by any other key as `unaccounted`.
+    """
+
+    def __init__(self, prefix="view", spans=False, overhead=False):
         Client.__init__(self, prefix)
         self.starts = collections.defaultdict(collections.deque)
         self.data = collections.defaultdict(float)
+        # List of `[key, time spent in children]` for the running keys
+        self.spans = [] if spans else None
+        self.exclusive = collections.defaultdict(float)
+        # Time spent in the helpers (`with_`, `incr`, etc.) of the scope
+        self.overhead = 0.0 if overhead else None
 
     def start(self, key):
         self.starts[key].append(time.time())
+        if self.spans is not None:
+            self.spans.append([key, 0.0])
 
     def stop(self, key):
         assert self.starts[key], (
             "Unable to stop tracking %s, never " "started tracking it" % key
         )
 
-        delta = time.time() - self.starts[key].pop()
+        now = time.time()
+        delta = now - self.starts[key].pop()
         # Clean up when we're done
         if not self.starts[key]:
             del self.starts[key]
 
         self.data[key] += delta
+        if self.spans is not None:
+            self.stop_span(key, delta)
         return delta
 
+    def stop_span(self, key, delta):
+        # Normally the key is on top of the stack but keys that are not
+        # properly nested (e.g. the middleware timings) are stopped as well
+        for i in range(len(self.spans) - 1, -1, -1):
+            if self.spans[i][0] == key:
+                children = self.spans.pop(i)[1]
+                break
+        else:
+            return
+
+        self.exclusive[key] += max(delta - children, 0.0)
+        if i:
+            self.spans[i - 1][1] += delta
+
+    def add(self, key, delta):
+        self.data[key] += delta
+
     def submit(self, *args):
-        client = self.get_client(*args)
+        backend = backends.get_backend()
+        name = self.get_name(*args)
         for k in list(self.data.keys()):
-            client.send(k, self.data.pop(k))
+            backend.timer("%s.%s" % (name, k), self.data.pop(k) * 1000)
+        for k in list(self.exclusive.keys()):
+            if k == "total":
+                key = "unaccounted"
+            else:
+                key = "self.%s" % k
+            backend.timer("%s.%s" % (name, key), self.exclusive.pop(k) * 1000)
+        backend.flush()
 
         if settings.STATSD_DEBUG:
             assert not self.starts, (
@@ -122,13 +212,175 @@ class Timer(Client):
         return WithTimer(self, key)
 
 
-class StatsdMiddleware(MiddlewareMixin):
-    scope = threading.local()
+class Distribution(Client):
+    # Every value is sent separately so the backend can calculate the
+    # percentiles, for statsd these are sent as timings
+    def __init__(self, prefix="view"):
+        Client.__init__(self, prefix)
+        self.data = collections.defaultdict(list)
 
-    def __init__(self, get_response=None):
-        super().__init__(get_response)
-        self.scope.timings = None
-        self.scope.counter = None
+    def add(self, key, value):
+        self.data[key].append(value)
+
+    def submit(self, *args):
+        backend = backends.get_backend()
+        name = self.get_name(*args)
+        for k in list(self.data.keys()):
+            for v in self.data.pop(k):
+                backend.histogram("%s.%s" % (name, k), v)
+        backend.flush()
+
+
+class Gauge(Client):
+    def __init__(self, prefix="view"):
+        Client.__init__(self, prefix)
+        self.data = {}
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def submit(self, *args):
+        backend = backends.get_backend()
+        name = self.get_name(*args)
+        for k in list(self.data.keys()):
+            backend.gauge("%s.%s" % (name, k), self.data.pop(k))
+        backend.flush()
+
+
+class Set(Client):
+    """Counts unique values locally, the estimates are sent as gauges
+
+    Sending every member to statsd is expensive for both sides so the values
+    are counted with a `HyperLogLog` of `STATSD_HLL_PRECISION`.
+    """
+
+    def __init__(self, prefix="view"):
+        Client.__init__(self, prefix)
+        self.data = {}
+
+    def add(self, key, value):
+        counter = self.data.get(key)
+        if counter is None:
+            counter = self.data[key] = hll.HyperLogLog(settings.STATSD_HLL_PRECISION)
+        counter.add(value)
+
+    def submit(self, *args):
+        backend = backends.get_backend()
+        name = self.get_name(*args)
+        for k in list(self.data.keys()):
+            backend.gauge("%s.%s" % (name, k), self.data.pop(k).count())
+        backend.flush()
+
+
+class StreamTimer(object):
+    """Times the streaming of a response body after the view has returned
+
+    All durations are measured from the start of the request so
+    `stream_first_chunk` is the time to first byte and `stream_total` the
+    time until the last byte.
+    """
+
+    def __init__(self, started, *key):
+        self.started = started
+        self.key = key
+        self.size = 0
+        self.chunks = 0
+        self.finished = False
+        self.timings = Timer()
+        self.counter = Counter()
+        self.distribution = Distribution()
+
+    def chunk(self, chunk):
+        if not self.chunks:
+            self.timings.add("stream_first_chunk", time.time() - self.started)
+        self.chunks += 1
+        self.size += len(chunk)
+
+    def wrap(self, iterator):
+        try:
+            for chunk in iterator:
+                self.chunk(chunk)
+                yield chunk
+        finally:
+            self.finish()
+
+    async def async_wrap(self, iterator):
+        try:
+            async for chunk in iterator:
+                self.chunk(chunk)
+                yield chunk
+        finally:
+            self.finish()
+
+    def finish(self):
+        if self.finished:
+            return
+
+        self.finished = True
+        self.timings.add("stream_total", time.time() - self.started)
+        self.counter.increment("stream_bytes", self.size)
+        self.distribution.add("response_size", self.size)
+        self.timings.submit(*self.key)
+        self.counter.submit(*self.key)
+        self.distribution.submit(*self.key)
+
+
+class Scope(object):
+    """The metrics of the request, task or command that is running"""
+
+    timings = None
+    counter = None
+    counter_site = None
+    timings_site = None
+    distribution = None
+    gauges = None
+    sets = None
+    started = None
+    # Whether the detailed timers (sql, redis, etc.) are enabled
+    detailed = True
+    view_name = None
+    cold = False
+    profile = None
+    memory_traced = None
+    memory_rss = None
+
+    def __init__(self, parent=None):
+        # The scope this one was started in (e.g. the command making a
+        # request), restored by `StatsdMiddleware.finish`
+        self.parent = parent
+
+
+# Unlike `threading.local` this follows the request across `await`s and
+# `sync_to_async`/`async_to_sync` calls. The scope is a single object so the
+# helpers only look it up once, the attributes are plain attributes.
+_scope = contextvars.ContextVar("statsd_scope")
+
+
+def get_scope():
+    """Return the scope of the current thread or task"""
+    scope = _scope.get(None)
+    if scope is None:
+        scope = Scope()
+        _scope.set(scope)
+    return scope
+
+
+class ScopeProxy(object):
+    """Forwards to the scope of the current thread or task, for code that
+    uses `StatsdMiddleware.scope` like the `threading.local` it used to be"""
+
+    def __getattr__(self, name):
+        return getattr(get_scope(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_scope(), name, value)
+
+    def __delattr__(self, name):
+        delattr(get_scope(), name)
+
+
+class StatsdMiddleware(MiddlewareMixin):
+    scope = ScopeProxy()
 
     @classmethod
     def custom_event_counter(cls, prefix, event, *target, delta=1):
@@ -144,62 +396,134 @@ class StatsdMiddleware(MiddlewareMixin):
 
     @classmethod
     def start(cls, prefix="view", *started):
+        begin = time.perf_counter()
         if started:
             cls.custom_event_counter(prefix, "start", *started)
 
-        cls.scope.timings = Timer(prefix)
-        cls.scope.timings.start("total")
-        cls.scope.counter = Counter(prefix)
-        cls.scope.counter.increment("hit")
-        cls.scope.counter_site = Counter(prefix)
-        cls.scope.counter_site.increment("hit")
-        return cls.scope
+        parent = get_scope()
+        scope = Scope(parent if parent.timings else None)
+        scope.started = time.time()
+        scope.timings = Timer(
+            prefix,
+            spans=settings.STATSD_EXCLUSIVE_TIMINGS,
+            overhead=settings.STATSD_TRACK_OVERHEAD,
+        )
+        scope.timings.start("total")
+        scope.counter = Counter(prefix)
+        scope.counter.increment("hit")
+        scope.counter_site = Counter(prefix)
+        scope.counter_site.increment("hit")
+        scope.distribution = Distribution(prefix)
+        scope.timings_site = Timer(prefix)
+        scope.gauges = Gauge(prefix)
+        scope.sets = Set(prefix)
+        scope.detailed = overhead.sample()
+        memory.start_request(scope)
+        _scope.set(scope)
+        add_overhead(scope.timings, begin)
+        return scope
 
     @classmethod
     def stop(cls, *key):
-        if getattr(cls.scope, "timings", None):
-            cls.scope.timings.stop("total")
-            cls.scope.timings.submit(*key)
-            cls.scope.counter.submit(*key)
-            cls.scope.counter_site.submit("site")
+        scope = get_scope()
+        timings = scope.timings
+        if timings:
+            stopped = time.perf_counter()
+            memory.stop_request(scope)
+            total = timings.stop("total")
+            timings.submit(*key)
+            scope.counter.submit(*key)
+            scope.counter_site.submit("site")
+            scope.timings_site.submit("site")
+            scope.distribution.submit(*key)
+            scope.gauges.submit(*key)
+            scope.sets.submit(*key)
+            # Nothing is recorded in a stopped scope, `finish` leaves it
+            scope.timings = None
+
+            if timings.overhead is not None:
+                spent = timings.overhead + time.perf_counter() - stopped
+                overhead.report(timings.get_name(*key), spent, total)
+
+    @classmethod
+    def finish(cls):
+        """Leave the current scope and go back to the scope it was started in,
+        so a command keeps its metrics after running a request or task"""
+        _scope.set(get_scope().parent or Scope())
 
     @classmethod
     def fail(cls, *key):
-        if getattr(cls.scope, "timings", None):
-            cls.scope.counter.increment("fail")
-            cls.scope.timings.stop("total")
-            cls.scope.timings.submit(*key)
-            cls.scope.counter.submit(*key)
-            cls.scope.counter_site.submit("site")
+        scope = get_scope()
+        if scope.timings:
+            scope.counter.increment("fail")
+            cls.stop(*key)
 
     def process_request(self, request):
         # store the timings in the request so it can be used everywhere
-        request.statsd = self.start()
+        request.statsd = scope = self.start()
+        if settings.STATSD_TRACK_CONCURRENCY:
+            concurrency.tracker.enter()
         if settings.STATSD_TRACK_MIDDLEWARE:
-            self.scope.timings.start("process_request")
-        self.view_name = None
+            scope.timings.start("process_request")
+        if settings.STATSD_TRACK_QUEUE_TIME:
+            self.track_queue_time(scope, request)
+        if settings.STATSD_TRACK_STARTUP:
+            scope.cold = startup.startup.cold(scope.started)
+        if settings.STATSD_PROFILE_RATE and (
+            random.random() < settings.STATSD_PROFILE_RATE
+        ):
+            scope.profile = profiler.start()
+
+    def track_queue_time(self, scope, request):
+        header = request.META.get("HTTP_X_REQUEST_START") or request.META.get(
+            "HTTP_X_QUEUE_START"
+        )
+        if not header:
+            return
+
+        queued = parse_request_start(header)
+        if queued is None:
+            return
+
+        # Clocks of the proxy and this server are never exactly in sync, a
+        # negative wait is clamped and absurd values are ignored
+        delta = max(scope.started - queued, 0.0)
+        if delta <= settings.STATSD_QUEUE_TIME_MAX:
+            scope.timings.add("queue_time", delta)
+            scope.timings_site.add("queue_time", delta)
 
     def process_view(self, request, view_func, view_args, view_kwargs):
+        scope = get_scope()
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.start("process_view")
+            scope.timings.start("process_view")
 
         # View name is defined as module.view
         # (e.g. django.contrib.auth.views.login)
-        self.view_name = view_func.__module__
+        view_name = view_func.__module__
 
         # CBV specific
         if hasattr(view_func, "__name__"):
-            self.view_name = "%s.%s" % (self.view_name, view_func.__name__)
+            view_name = "%s.%s" % (view_name, view_func.__name__)
         elif hasattr(view_func, "__class__"):
-            self.view_name = "%s.%s" % (self.view_name, view_func.__class__.__name__)
+            view_name = "%s.%s" % (view_name, view_func.__class__.__name__)
+
+        view_name = cardinality.guard("view", view_name)
 
         if MAKE_TAGS_LIKE:
-            self.view_name = self.view_name.replace(".", "_")
-            self.view_name = "view" + MAKE_TAGS_LIKE + self.view_name
+            view_name = view_name.replace(".", "_")
+            view_name = "view" + MAKE_TAGS_LIKE + view_name
+
+        # Stored in the scope as the middleware instance is shared between
+        # concurrent requests
+        scope.view_name = view_name
 
     def process_response(self, request, response):
+        scope = get_scope()
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.stop("process_response")
+            scope.timings.stop("process_response")
+        if settings.STATSD_TRACK_CONCURRENCY and getattr(request, "statsd", None):
+            concurrency.tracker.leave()
+        view_name = scope.view_name
         if MAKE_TAGS_LIKE:
             method = "method" + MAKE_TAGS_LIKE
             method += request.method.lower().replace(".", "_")
@@ -207,8 +531,7 @@ class StatsdMiddleware(MiddlewareMixin):
             is_ajax = "is_ajax" + MAKE_TAGS_LIKE
             is_ajax += str(request.is_ajax()).lower()
 
-            if getattr(self, "view_name", None):
-                self.stop(method, self.view_name, is_ajax)
+            key = (method, view_name, is_ajax)
         else:
             method = request.method.lower()
             is_ajax = (
@@ -217,48 +540,86 @@ class StatsdMiddleware(MiddlewareMixin):
             )
             if is_ajax:
                 method += "_ajax"
-            if getattr(self, "view_name", None):
-                self.stop(method, self.view_name)
+            key = (method, view_name)
+
+        if view_name:
+            self.track_response(scope, response, *key)
+            self.track_profile(scope, ".".join(key))
+            self.stop(*key)
+        if scope.cold:
+            # The first request of a process is also sent as `startup`
+            startup.startup.report(time.time())
         self.cleanup(request)
         return response
 
+    def track_response(self, scope, response, *key):
+        if not response.streaming:
+            scope.distribution.add("response_size", len(response.content))
+            return
+
+        stream = StreamTimer(scope.started, *key)
+        if getattr(response, "file_to_stream", None) is not None:
+            # Wrapping the iterator would disable `wsgi.file_wrapper` (and
+            # with that `sendfile`) so only measure when the response closes
+            stream.size = int(response.get("Content-Length", 0))
+            response._resource_closers.append(stream.finish)
+        elif response.is_async:
+            response.streaming_content = stream.async_wrap(response.streaming_content)
+        else:
+            response.streaming_content = stream.wrap(response.streaming_content)
+
+    def track_profile(self, scope, name):
+        profile = scope.profile
+        if profile is None:
+            return
+
+        profiler.stop(profile)
+        scope.profile = None
+        if time.time() - scope.started >= settings.STATSD_PROFILE_THRESHOLD:
+            profiler.report(profile, scope.counter, name)
+
     def process_exception(self, request, exception):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.stop("process_exception")
+            get_scope().timings.stop("process_exception")
 
     def process_template_response(self, request, response):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.stop("process_template_response")
+            get_scope().timings.stop("process_template_response")
         return response
 
     def cleanup(self, request):
-        self.scope.timings = None
-        self.scope.counter = None
-        self.view_name = None
+        scope = getattr(request, "statsd", None)
+        if scope is not None:
+            memory.release_request(scope)
+            if scope.profile is not None:
+                profiler.stop(scope.profile)
+                scope.profile = None
+            if get_scope() is scope:
+                self.finish()
         request.statsd = None
 
 
 class StatsdMiddlewareTimer(MiddlewareMixin):
     def process_request(self, request):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.stop("process_request")
+            get_scope().timings.stop("process_request")
 
     def process_view(self, request, view_func, view_args, view_kwargs):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.stop("process_view")
+            get_scope().timings.stop("process_view")
 
     def process_response(self, request, response):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.start("process_response")
+            get_scope().timings.start("process_response")
         return response
 
     def process_exception(self, request, exception):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.start("process_exception")
+            get_scope().timings.start("process_exception")
 
     def process_template_response(self, request, response):
         if settings.STATSD_TRACK_MIDDLEWARE:
-            StatsdMiddleware.scope.timings.start("process_template_response")
+            get_scope().timings.start("process_template_response")
         return response
 
 
@@ -281,48 +642,138 @@ class DummyWith(object):
     def __exit__(self, type_, value, traceback):
         pass
 
+    async def __aenter__(self):
+        pass
 
-def start(key):
-    if getattr(StatsdMiddleware.scope, "timings", None):
-        StatsdMiddleware.scope.timings.start(key)
+    async def __aexit__(self, type_, value, traceback):
+        pass
 
 
-def stop(key):
-    if getattr(StatsdMiddleware.scope, "timings", None):
-        return StatsdMiddleware.scope.timings.stop(key)
+def add_overhead(timings, started):
+    """Add the time since `started` to the overhead of the scope of `timings`
 
+    The public helpers measure themselves from entry to exit, so the scope
+    lookups and the dispatching are included and not only the timer.
+    """
+    if timings and timings.overhead is not None:
+        timings.overhead += time.perf_counter() - started
 
-def with_(key):
-    if getattr(StatsdMiddleware.scope, "timings", None):
-        return StatsdMiddleware.scope.timings(key)
-    else:
-        return DummyWith()
 
+def detailed():
+    """Return whether the detailed timers are enabled for the current scope
 
-def incr(key, value=1):
-    if getattr(StatsdMiddleware.scope, "counter", None):
-        StatsdMiddleware.scope.counter.increment(key, value)
+    The detailed timers (sql, redis, json, templates and cache) are disabled
+    for some of the requests when over the `STATSD_OVERHEAD_BUDGET`.
+    """
+    scope = get_scope()
+    return bool(scope.timings) and scope.detailed
 
 
-def decr(key, value=1):
-    if getattr(StatsdMiddleware.scope, "counter", None):
-        StatsdMiddleware.scope.counter.decrement(key, value)
+def start(key, detail=False):
+    started = time.perf_counter()
+    scope = get_scope()
+    timings = scope.timings
+    if timings and (scope.detailed or not detail):
+        timings.start(key)
+        add_overhead(timings, started)
 
 
-def wrapper(prefix, f):
-    @functools.wraps(f)
-    def _wrapper(*args, **kwargs):
-        with with_("%s.%s" % (prefix, f.__name__.lower())):
-            return f(*args, **kwargs)
+def stop(key, detail=False):
+    started = time.perf_counter()
+    scope = get_scope()
+    timings = scope.timings
+    if timings and (scope.detailed or not detail):
+        delta = timings.stop(key)
+        add_overhead(timings, started)
+        return delta
 
-    return _wrapper
 
+def with_(key, detail=False):
+    started = time.perf_counter()
+    scope = get_scope()
+    timings = scope.timings
+    if timings and (scope.detailed or not detail):
+        timer = WithTimer(timings, key)
+        add_overhead(timings, started)
+        return timer
+    return DummyWith()
+
+
+def incr(key, value=1):
+    started = time.perf_counter()
+    scope = get_scope()
+    if scope.counter:
+        scope.counter.increment(key, value)
+        add_overhead(scope.timings, started)
+
+
+def decr(key, value=1):
+    started = time.perf_counter()
+    scope = get_scope()
+    if scope.counter:
+        scope.counter.decrement(key, value)
+        add_overhead(scope.timings, started)
+
+
+def observe(key, value):
+    started = time.perf_counter()
+    scope = get_scope()
+    if scope.distribution:
+        scope.distribution.add(key, value)
+        add_overhead(scope.timings, started)
+
+
+def gauge(key, value):
+    started = time.perf_counter()
+    scope = get_scope()
+    if scope.gauges:
+        scope.gauges.set(key, value)
+        add_overhead(scope.timings, started)
+
+
+def unique(key, value):
+    started = time.perf_counter()
+    scope = get_scope()
+    if scope.sets:
+        scope.sets.add(key, value)
+        add_overhead(scope.timings, started)
+
+
+def wrapper(prefix, f, detail=False):
+    return named_wrapper("%s.%s" % (prefix, f.__name__.lower()), f, detail)
+
+
+def named_wrapper(name, f, detail=False):
+    if inspect.isasyncgenfunction(f):
+
+        @functools.wraps(f)
+        async def _wrapper(*args, **kwargs):
+            # Only time the generator itself, not the code consuming it
+            iterator = f(*args, **kwargs)
+            try:
+                while True:
+                    with with_(name, detail):
+                        try:
+                            value = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield value
+            finally:
+                await iterator.aclose()
+
+    elif iscoroutinefunction(f):
+
+        @functools.wraps(f)
+        async def _wrapper(*args, **kwargs):
+            with with_(name, detail):
+                return await f(*args, **kwargs)
+
+    else:
 
-def named_wrapper(name, f):
-    @functools.wraps(f)
-    def _wrapper(*args, **kwargs):
-        with with_(name):
-            return f(*args, **kwargs)
+        @functools.wraps(f)
+        def _wrapper(*args, **kwargs):
+            with with_(name, detail):
+                return f(*args, **kwargs)
 
     return _wrapper
 
@@ -0,0 +1,110 @@
+"""Count the rows fetched and the model instances created by the ORM
+
+Enabled with `STATSD_TRACK_ORM`, per request this sends:
+
+- `orm.rows`: the number of rows fetched by querysets
+- `orm.instances.<app_label>.<model>`: the number of model instances created
+- `orm.large_querysets`: the number of querysets evaluated without slicing
+  that returned more than `STATSD_ORM_LARGE_QUERYSET` rows
+"""
+
+import functools
+
+import django_statsd
+from django_statsd.middleware import get_scope
+
+from . import settings
+
+
+def execute_sql_wrapper(f):
+    @functools.wraps(f)
+    def _execute_sql(self, *args, **kwargs):
+        result = f(self, *args, **kwargs)
+        if not get_scope().counter:
+            return result
+
+        result_type = args[0] if args else kwargs.get("result_type", compiler.MULTI)
+        if result_type == compiler.SINGLE:
+            if result:
+                django_statsd.incr("orm.rows")
+        elif result_type == compiler.MULTI and result is not None:
+            if isinstance(result, list):
+                django_statsd.incr("orm.rows", sum(len(chunk) for chunk in result))
+            else:
+                result = count_chunks(result)
+        return result
+
+    return _execute_sql
+
+
+def count_chunks(chunks):
+    # Chunked reads (e.g. `QuerySet.iterator()`) are counted as they arrive
+    rows = 0
+    try:
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+    finally:
+        if rows:
+            django_statsd.incr("orm.rows", rows)
+
+
+def model_iterable_wrapper(f):
+    @functools.wraps(f)
+    def __iter__(self):
+        if not get_scope().counter:
+            yield from f(self)
+            return
+
+        instances = 0
+        try:
+            for instance in f(self):
+                instances += 1
+                yield instance
+        finally:
+            if instances:
+                django_statsd.incr(
+                    "orm.instances.%s" % self.queryset.model._meta.label_lower,
+                    instances,
+                )
+
+    return __iter__
+
+
+def fetch_all_wrapper(f):
+    @functools.wraps(f)
+    def _fetch_all(self):
+        evaluated = self._result_cache is not None
+        f(self)
+        if (
+            not evaluated
+            and self.query.low_mark == 0
+            and self.query.high_mark is None
+            and len(self._result_cache) > settings.STATSD_ORM_LARGE_QUERYSET
+        ):
+            django_statsd.incr("orm.large_querysets")
+
+    return _fetch_all
+
+
+try:
+    from django.db.models import query
+    from django.db.models.sql import compiler
+
+    def patch():
+        """Instrument the querysets, called from the app config when
+        `STATSD_TRACK_ORM` is enabled"""
+        if hasattr(query, "statsd_patched"):
+            return
+
+        query.statsd_patched = True
+        compiler.SQLCompiler.execute_sql = execute_sql_wrapper(
+            compiler.SQLCompiler.execute_sql
+        )
+        query.ModelIterable.__iter__ = model_iterable_wrapper(
+            query.ModelIterable.__iter__
+        )
+        query.QuerySet._fetch_all = fetch_all_wrapper(query.QuerySet._fetch_all)
+
+except ImportError:
+    pass
@@ -0,0 +1,74 @@
+"""Measure the time spent in django_statsd itself
+
+With `STATSD_TRACK_OVERHEAD` the middleware measures the time spent creating
+the request scope, in the helpers (`with_`, `incr`, etc.) and submitting the
+metrics, and sends it as `statsd.overhead` per view.
+
+With `STATSD_OVERHEAD_BUDGET` (a fraction of the request time, e.g. `0.01`)
+the detailed timers (sql, redis, json, templates and cache) are only enabled
+for a fraction of the requests once the average overhead exceeds the budget.
+Every 100 requests the fraction is halved when the overhead was over budget
+and raised again slowly when it was well within the budget.
+"""
+
+import random
+
+from . import backends
+from . import settings
+
+
+class OverheadBudget(object):
+    """Adjusts the rate of the detailed timers every `window` requests"""
+
+    def __init__(self, budget, min_rate=0.01, window=100):
+        self.budget = budget
+        self.min_rate = min_rate
+        self.window = window
+        self.rate = 1.0
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.overhead = 0.0
+        self.total = 0.0
+
+    def sample(self):
+        """Return whether the detailed timers are enabled for a request"""
+        return self.rate >= 1.0 or random.random() < self.rate
+
+    def update(self, overhead, total):
+        # Races between threads only lose an update, no need for locking
+        self.requests += 1
+        self.overhead += overhead
+        self.total += total
+        if self.requests < self.window:
+            return
+
+        ratio = self.overhead / self.total if self.total > 0 else 0.0
+        self.reset()
+        if ratio > self.budget:
+            self.rate = max(self.rate / 2.0, self.min_rate)
+        elif ratio < self.budget / 2.0:
+            self.rate = min(self.rate * 1.25, 1.0)
+
+
+budget = None
+if settings.STATSD_OVERHEAD_BUDGET:
+    budget = OverheadBudget(
+        settings.STATSD_OVERHEAD_BUDGET, settings.STATSD_OVERHEAD_MIN_RATE
+    )
+
+
+def sample():
+    if budget is None:
+        return True
+    return budget.sample()
+
+
+def report(name, overhead, total):
+    """Send the overhead of a request and update the budget"""
+    backend = backends.get_backend()
+    backend.timer("%s.statsd.overhead" % name, overhead * 1000)
+    backend.flush()
+    if budget is not None:
+        budget.update(overhead, total)
@@ -0,0 +1,70 @@
+import threading
+
+from . import sampler
+from . import settings
+from .middleware import Counter, Gauge, Set, Timer
+
+
+class ProcessMetrics(sampler.PeriodicSampler):
+    """Process wide metrics which are flushed by a background thread
+
+    Unlike the request scoped helpers these collect values across requests,
+    e.g. `unique("users", request.user.pk)` counts the unique users seen by
+    this process per interval.
+    """
+
+    name = "statsd-process"
+
+    def __init__(self, interval, prefix="process"):
+        sampler.PeriodicSampler.__init__(self, interval)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counter = Counter(self.prefix)
+        self.gauges = Gauge(self.prefix)
+        self.sets = Set(self.prefix)
+        self.timings = Timer(self.prefix)
+
+    def incr(self, key, value=1):
+        self.ensure_running()
+        with self.lock:
+            self.counter.increment(key, value)
+
+    def gauge(self, key, value):
+        self.ensure_running()
+        with self.lock:
+            self.gauges.set(key, value)
+
+    def unique(self, key, value):
+        self.ensure_running()
+        with self.lock:
+            self.sets.add(key, value)
+
+    def timing(self, key, delta):
+        self.ensure_running()
+        with self.lock:
+            self.timings.add(key, delta)
+
+    def sample(self):
+        with self.lock:
+            counter, gauges, sets, timings = (
+                self.counter,
+                self.gauges,
+                self.sets,
+                self.timings,
+            )
+            self.reset()
+
+        counter.submit()
+        gauges.submit()
+        sets.submit()
+        timings.submit()
+
+
+metrics = ProcessMetrics(settings.STATSD_PROCESS_INTERVAL)
+incr = metrics.incr
+gauge = metrics.gauge
+unique = metrics.unique
+timing = metrics.timing
@@ -0,0 +1,167 @@
+"""Sampling profiler for finding out why slow requests are slow
+
+A fraction (`STATSD_PROFILE_RATE`) of the requests registers its thread
+with a background thread which samples the stack of the registered threads
+every `STATSD_PROFILE_INTERVAL` seconds using `sys._current_frames()`.
+Requests that finish within `STATSD_PROFILE_THRESHOLD` seconds simply throw
+their samples away. For slow requests the functions seen most often at the
+top of the stack are counted as `profile.hot.<function>` and all stacks are
+written to `STATSD_PROFILE_FILE` in the collapsed format used by
+`flamegraph.pl` and speedscope.
+
+The stacks are sampled per thread so async views, which share the event
+loop thread with other requests, are not supported.
+"""
+
+import re
+import sys
+import logging
+import threading
+import collections
+from logging import handlers
+
+from . import cardinality
+from . import sampler
+from . import settings
+
+logger = logging.getLogger(__name__)
+stacks_logger = logging.getLogger(__name__ + ".stacks")
+_stacks_logger_lock = threading.Lock()
+stacks_logger.propagate = False
+
+_invalid_chars = re.compile(r"[^\w.-]+")
+
+
+class Profile(object):
+    def __init__(self, ident):
+        self.ident = ident
+        self.samples = 0
+        self.stacks = collections.Counter()
+
+    def hot_functions(self, limit):
+        """Return the `(function, samples)` seen most on top of the stack"""
+        functions = collections.Counter()
+        for stack, count in self.stacks.items():
+            functions[stack[-1]] += count
+        return functions.most_common(limit)
+
+    def collapsed(self, root=None):
+        """Yield the stacks as `root;outer;...;inner count` lines"""
+        for stack, count in self.stacks.most_common():
+            if root:
+                stack = (root,) + stack
+            yield "%s %d" % (";".join(stack), count)
+
+
+def frame_name(frame):
+    code = frame.f_code
+    name = "%s:%s" % (frame.f_globals.get("__name__", "?"), code.co_name)
+    # The collapsed format uses `;` and spaces as separators
+    return name.replace(";", "_").replace(" ", "_")
+
+
+class StackSampler(sampler.PeriodicSampler):
+    """Samples the stacks of the profiled threads
+
+    The thread only wakes up while at least one profile is running.
+    """
+
+    name = "statsd-profiler"
+
+    def __init__(self, interval, max_depth=128):
+        sampler.PeriodicSampler.__init__(self, interval)
+        self.max_depth = max_depth
+        self.lock = threading.Lock()
+        self.profiles = {}
+        self.busy = threading.Event()
+
+    def start_profile(self):
+        self.ensure_running()
+        profile = Profile(threading.get_ident())
+        with self.lock:
+            self.profiles[profile.ident] = profile
+            self.busy.set()
+        return profile
+
+    def stop_profile(self, profile):
+        with self.lock:
+            self.profiles.pop(profile.ident, None)
+            if not self.profiles:
+                self.busy.clear()
+            # The samples are updated under the lock, report from a copy
+            profile.stacks = collections.Counter(profile.stacks)
+        return profile
+
+    def stop(self):
+        sampler.PeriodicSampler.stop(self)
+        # Wake up the thread if it is waiting for a profile
+        self.busy.set()
+
+    def run(self):
+        event = self.event
+        while not event.is_set():
+            self.busy.wait()
+            if event.wait(self.interval):
+                break
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Unable to sample %s", self.name)
+
+    def sample(self):
+        with self.lock:
+            profiles = list(self.profiles.values())
+        if not profiles:
+            return
+
+        frames = sys._current_frames()
+        stacks = []
+        for profile in profiles:
+            frame = frames.get(profile.ident)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                stacks.append((profile, tuple(stack)))
+
+        with self.lock:
+            for profile, stack in stacks:
+                # Skip the profiles stopped while walking the stacks
+                if self.profiles.get(profile.ident) is profile:
+                    profile.stacks[stack] += 1
+                    profile.samples += 1
+
+
+def get_stacks_logger():
+    if not stacks_logger.handlers and settings.STATSD_PROFILE_FILE:
+        with _stacks_logger_lock:
+            # Concurrent slow requests would add a handler each
+            if not stacks_logger.handlers:
+                handler = handlers.RotatingFileHandler(
+                    settings.STATSD_PROFILE_FILE,
+                    maxBytes=settings.STATSD_PROFILE_FILE_MAX_BYTES,
+                    backupCount=settings.STATSD_PROFILE_FILE_BACKUPS,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                stacks_logger.addHandler(handler)
+                stacks_logger.setLevel(logging.INFO)
+    return stacks_logger
+
+
+def report(profile, counter, name):
+    """Count the hot functions of a slow request and write its stacks"""
+    counter.increment("profile.slow")
+    counter.increment("profile.samples", profile.samples)
+    for function, count in profile.hot_functions(settings.STATSD_PROFILE_TOP):
+        key = cardinality.guard("profile", _invalid_chars.sub("_", function))
+        counter.increment("profile.hot.%s" % key, count)
+
+    if settings.STATSD_PROFILE_FILE:
+        get_stacks_logger().info("\n".join(profile.collapsed(name)))
+
+
+stack_sampler = StackSampler(settings.STATSD_PROFILE_INTERVAL)
+start = stack_sampler.start_profile
+stop = stack_sampler.stop_profile
@@ -0,0 +1,156 @@
+"""Record every metric into a memory-mapped ring file for offline analysis
+
+Instead of sending the metrics to statsd they are appended as fixed size
+binary records to a memory-mapped file, so recording a metric is a few
+`struct.pack_into` calls without any system calls. When the file is full the
+oldest records are overwritten.
+
+The metric names are stored once in a `<file>.keys` side table, every
+record only contains the line number of the name in that table.
+"""
+
+import os
+import csv
+import json
+import mmap
+import time
+import struct
+import threading
+import collections
+
+from . import settings
+
+MAGIC = b"DJSTATSD"
+VERSION = 1
+#: magic, version, record size, capacity, number of records written
+HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+WRITTEN = struct.Struct("<Q")
+WRITTEN_OFFSET = 24
+#: timestamp, value, key id, type
+RECORD = struct.Struct("<ddIB3x")
+
+TYPES = {"c": 1, "ms": 2, "g": 3, "s": 4}
+TYPE_NAMES = dict((v, k) for k, v in TYPES.items())
+
+
+class RingWriter(object):
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.written = 0
+        self.pid = os.getpid()
+
+        size = HEADER_SIZE + RECORD.size * capacity
+        with open(path, "w+b") as fh:
+            fh.truncate(size)
+            self.mmap = mmap.mmap(fh.fileno(), size)
+        HEADER.pack_into(self.mmap, 0, MAGIC, VERSION, RECORD.size, capacity, 0)
+        self.keys_file = open(path + ".keys", "w")
+
+    def key_id(self, name):
+        # Called with the lock held
+        key_id = self.keys.get(name)
+        if key_id is None:
+            key_id = self.keys[name] = len(self.keys)
+            self.keys_file.write(name + "\n")
+            self.keys_file.flush()
+        return key_id
+
+    def write(self, name, value, type_, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self.lock:
+            offset = HEADER_SIZE + RECORD.size * (self.written % self.capacity)
+            RECORD.pack_into(
+                self.mmap, offset, timestamp, value, self.key_id(name), type_
+            )
+            self.written += 1
+            WRITTEN.pack_into(self.mmap, WRITTEN_OFFSET, self.written)
+
+    def close(self):
+        self.mmap.close()
+        self.keys_file.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the ring writer for this process
+
+    The file name is formatted with the pid (e.g. `/tmp/statsd-%(pid)s.ring`)
+    so every worker of a prefork server writes to its own file.
+    """
+    global _writer
+    pid = os.getpid()
+    if _writer is None or _writer.pid != pid:
+        with _writer_lock:
+            if _writer is None or _writer.pid != pid:
+                path = settings.STATSD_RECORDING_FILE % dict(pid=pid)
+                _writer = RingWriter(path, settings.STATSD_RECORDING_CAPACITY)
+    return _writer
+
+
+class RingReader(object):
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self.data = fh.read()
+        magic, version, record_size, self.capacity, self.written = HEADER.unpack_from(
+            self.data
+        )
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError("%r is not a django_statsd recording" % path)
+
+        with open(path + ".keys") as fh:
+            self.keys = fh.read().splitlines()
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def __iter__(self):
+        """Yield `(timestamp, name, value, type)` from oldest to newest"""
+        first = max(self.written - self.capacity, 0)
+        for i in range(first, self.written):
+            offset = HEADER_SIZE + RECORD.size * (i % self.capacity)
+            timestamp, value, key_id, type_ = RECORD.unpack_from(self.data, offset)
+            yield timestamp, self.keys[key_id], value, TYPE_NAMES.get(type_)
+
+    def summary(self, percentiles=(50, 90, 95, 99)):
+        values = collections.defaultdict(list)
+        types = {}
+        for _, name, value, type_ in self:
+            values[name].append(value)
+            types[name] = type_
+
+        summary = {}
+        for name, data in values.items():
+            data.sort()
+            stats = summary[name] = dict(
+                type=types[name],
+                count=len(data),
+                sum=sum(data),
+                min=data[0],
+                max=data[-1],
+                mean=sum(data) / len(data),
+            )
+            for percentile in percentiles:
+                index = min(int(len(data) * percentile / 100.0), len(data) - 1)
+                stats["p%d" % percentile] = data[index]
+        return summary
+
+    def export_csv(self, fh):
+        writer = csv.writer(fh)
+        writer.writerow(("timestamp", "name", "value", "type"))
+        writer.writerows(self)
+
+    def export_json(self, fh):
+        """Write one json object per line and record (JSON lines)"""
+        for timestamp, name, value, type_ in self:
+            record = dict(timestamp=timestamp, name=name, value=value, type=type_)
+            fh.write(json.dumps(record) + "\n")
@@ -1,12 +1,14 @@
 from __future__ import absolute_import
 import django_statsd
+from django_statsd import cardinality
 
 try:
     import redis
 
     class StatsdRedis(redis.Redis):
         def execute_command(self, func_name, *args, **kwargs):
-            with django_statsd.with_("redis.%s" % func_name.lower()):
+            name = cardinality.guard("redis", func_name.lower())
+            with django_statsd.with_("redis.%s" % name, detail=True):
                 return origRedis.execute_command(self, func_name, *args, **kwargs)
 
     origRedis = None
@@ -0,0 +1,91 @@
+"""Time the lazy reading and parsing of request bodies
+
+Enabled with `STATSD_TRACK_REQUEST_BODY`. The first access of
+`request.body` is timed as `request.read_body` and the parsing of
+`request.POST`/`request.FILES` as `request.parse`. Per request this also
+sends:
+
+- `request.body_size`: the size of bodies read through `request.body`, or
+  the `Content-Length` of multipart bodies parsed without reading them
+- `request.upload_rate`: the bytes per second of bodies with uploaded files
+- `request.upload.memory` and `request.upload.temporary`: the number of
+  uploaded files kept in memory or written to a temporary file
+"""
+
+import time
+import functools
+
+import django_statsd
+from django_statsd.middleware import get_scope
+
+
+def body_wrapper(f):
+    @functools.wraps(f)
+    def _body(self):
+        if hasattr(self, "_body") or not get_scope().timings:
+            return f(self)
+
+        with django_statsd.with_("request.read_body"):
+            body = f(self)
+        django_statsd.observe("request.body_size", len(body))
+        return body
+
+    return _body
+
+
+def load_post_and_files_wrapper(f):
+    @functools.wraps(f)
+    def _load_post_and_files(self):
+        if self.method != "POST" or not get_scope().timings:
+            return f(self)
+
+        started = time.time()
+        try:
+            with django_statsd.with_("request.parse"):
+                return f(self)
+        finally:
+            track_upload(self, time.time() - started)
+
+    return _load_post_and_files
+
+
+def track_upload(request, elapsed):
+    try:
+        size = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        size = 0
+    # Other bodies are read (and measured) through `request.body`
+    if size and not hasattr(request, "_body"):
+        django_statsd.observe("request.body_size", size)
+
+    files = getattr(request, "_files", None)
+    if not files:
+        return
+
+    for uploaded in files.values():
+        if isinstance(uploaded, uploadedfile.TemporaryUploadedFile):
+            django_statsd.incr("request.upload.temporary")
+        elif isinstance(uploaded, uploadedfile.InMemoryUploadedFile):
+            django_statsd.incr("request.upload.memory")
+    if size and elapsed > 0:
+        django_statsd.observe("request.upload_rate", int(size / elapsed))
+
+
+try:
+    from django.core.files import uploadedfile
+    from django.http import request
+
+    def patch():
+        """Instrument the request bodies, called from the app config when
+        `STATSD_TRACK_REQUEST_BODY` is enabled"""
+        if hasattr(request, "statsd_patched"):
+            return
+
+        request.statsd_patched = True
+        request.HttpRequest.body = property(body_wrapper(request.HttpRequest.body.fget))
+        request.HttpRequest._load_post_and_files = load_post_and_files_wrapper(
+            request.HttpRequest._load_post_and_files
+        )
+
+except ImportError:
+    pass
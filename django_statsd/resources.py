@@ -0,0 +1,128 @@
+"""Periodically send the resource usage of the process
+
+Enabled with `STATSD_TRACK_RESOURCES`, the collector thread is started when
+the app is ready and restarted in every child process of a prefork server.
+Every `STATSD_RESOURCES_INTERVAL` seconds it sends (with the
+`STATSD_RESOURCES_PREFIX` prefix):
+
+- `rss`: the resident set size in bytes (Linux only)
+- `cpu.user`, `cpu.system` and `cpu.total`: the CPU utilization since the
+  previous sample, where 1 is one core fully used
+- `fds`: the number of open file descriptors (Linux only)
+- `threads`: the number of threads
+- `context_switches.voluntary` and `context_switches.involuntary` counters
+- `gc.gen<n>.objects` gauges and `gc.gen<n>.collections` counters
+"""
+
+import os
+import gc
+import time
+import threading
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from . import backends
+from . import memory
+from . import sampler
+from . import settings
+
+
+def count_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except (IOError, OSError):
+        return None
+
+
+def count_threads():
+    try:
+        with open("/proc/self/stat") as fh:
+            # The process name might contain spaces or parentheses
+            return int(fh.read().rpartition(")")[2].split()[17])
+    except (IOError, OSError, IndexError, ValueError):
+        return threading.active_count()
+
+
+class ResourceCollector(sampler.PeriodicSampler):
+    name = "statsd-resources"
+
+    def __init__(self, interval, prefix="process.resources"):
+        sampler.PeriodicSampler.__init__(self, interval)
+        if settings.STATSD_PREFIX:
+            prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
+        self.prefix = prefix
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.sampled = time.monotonic()
+        self.usage = self.get_usage()
+        self.collections = [stats["collections"] for stats in gc.get_stats()]
+
+    def start(self):
+        self.enabled = True
+        self.ensure_running()
+
+    def after_fork(self):
+        sampler.PeriodicSampler.after_fork(self)
+        # The counters of the parent don't apply to the child
+        self.reset()
+        if self.enabled:
+            self.ensure_running()
+
+    def get_usage(self):
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF)
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = (now - self.sampled) or 1.0
+        usage = self.get_usage()
+        previous = self.usage
+        collections = [stats["collections"] for stats in gc.get_stats()]
+        previous_collections = self.collections
+        self.sampled, self.usage, self.collections = now, usage, collections
+
+        prefix = self.prefix
+        backend = backends.get_backend()
+
+        rss = memory.get_rss()
+        if rss is not None:
+            backend.gauge(prefix + ".rss", rss)
+        fds = count_fds()
+        if fds is not None:
+            backend.gauge(prefix + ".fds", fds)
+        backend.gauge(prefix + ".threads", count_threads())
+
+        if usage is not None and previous is not None:
+            user = (usage.ru_utime - previous.ru_utime) / elapsed
+            system = (usage.ru_stime - previous.ru_stime) / elapsed
+            backend.gauge(prefix + ".cpu.user", round(user, 4))
+            backend.gauge(prefix + ".cpu.system", round(system, 4))
+            backend.gauge(prefix + ".cpu.total", round(user + system, 4))
+            backend.counter(
+                prefix + ".context_switches.voluntary",
+                usage.ru_nvcsw - previous.ru_nvcsw,
+            )
+            backend.counter(
+                prefix + ".context_switches.involuntary",
+                usage.ru_nivcsw - previous.ru_nivcsw,
+            )
+
+        for generation, objects in enumerate(gc.get_count()):
+            backend.gauge("%s.gc.gen%d.objects" % (prefix, generation), objects)
+        for generation, count in enumerate(collections):
+            backend.counter(
+                "%s.gc.gen%d.collections" % (prefix, generation),
+                count - previous_collections[generation],
+            )
+        backend.flush()
+
+
+collector = ResourceCollector(
+    settings.STATSD_RESOURCES_INTERVAL, settings.STATSD_RESOURCES_PREFIX
+)
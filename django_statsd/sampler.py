@@ -0,0 +1,58 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicSampler(object):
+    """Calls `sample()` every `interval` seconds from a daemon thread
+
+    The thread is started lazily by `ensure_running()` and restarted after a
+    fork, so every worker of a prefork server gets its own sampler.
+    """
+
+    name = "statsd-sampler"
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pid = None
+        self.thread = None
+        self.event = threading.Event()
+        self.thread_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.after_fork)
+
+    def after_fork(self):
+        # Threads don't survive a fork, and neither do locks held by them
+        self.pid = None
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def ensure_running(self):
+        if self.pid == os.getpid():
+            return
+
+        with self.thread_lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.event = threading.Event()
+                self.thread = threading.Thread(
+                    target=self.run, name=self.name, daemon=True
+                )
+                self.thread.start()
+
+    def stop(self):
+        self.event.set()
+        self.pid = None
+
+    def run(self):
+        event = self.event
+        while not event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Unable to sample %s", self.name)
+
+    def sample(self):
+        raise NotImplementedError("Subclasses must define a `sample` function")
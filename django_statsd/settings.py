@@ -41,3 +41,220 @@ STATSD_SAMPLE_RATE = get_setting("STATSD_SAMPLE_RATE", 1.0)
 STATSD_CACHE_TIMEOUT = get_setting("STATSD_CACHE_TIMEOUT", None)
 
 STATSD_DEFAULT_CELERY_QUEUE = get_setting("CELERY_TASK_DEFAULT_QUEUE", "celery")
+
+#: Maximum number of distinct template names to track, all templates after
+#: that are reported as `other`. Shorthand for the `template` entry of
+#: `STATSD_CARDINALITY_LIMITS`
+STATSD_TEMPLATE_MAX_NAMES = get_setting("STATSD_TEMPLATE_MAX_NAMES", 250)
+
+#: Track the time requests spent waiting in the load balancer or server
+#: queue using the `X-Request-Start` or `X-Queue-Start` headers
+STATSD_TRACK_QUEUE_TIME = get_setting("STATSD_TRACK_QUEUE_TIME", True)
+
+#: Queue times above this number of seconds are assumed to be caused by
+#: broken clocks or headers and are ignored
+STATSD_QUEUE_TIME_MAX = get_setting("STATSD_QUEUE_TIME_MAX", 300)
+
+#: Keep track of the number of requests in flight per process and send the
+#: concurrency and utilization gauges from a background thread
+STATSD_TRACK_CONCURRENCY = get_setting("STATSD_TRACK_CONCURRENCY", False)
+
+#: Number of seconds between the concurrency gauges
+STATSD_CONCURRENCY_INTERVAL = get_setting("STATSD_CONCURRENCY_INTERVAL", 10)
+
+#: Number of request handling threads per process, used to calculate the
+#: utilization
+STATSD_WORKER_THREADS = get_setting("STATSD_WORKER_THREADS", 1)
+
+#: Instead of sending the metrics to statsd, record all of them in this
+#: memory-mapped ring file. `%(pid)s` is replaced with the process id so
+#: every process gets its own file, e.g. `/tmp/statsd-%(pid)s.ring`
+STATSD_RECORDING_FILE = get_setting("STATSD_RECORDING_FILE")
+
+#: The number of records that fit in the ring file (24 bytes per record),
+#: when the file is full the oldest records are overwritten
+STATSD_RECORDING_CAPACITY = get_setting("STATSD_RECORDING_CAPACITY", 1000000)
+
+#: The backend all metrics are sent to. Included are
+#: `django_statsd.backends.statsd.StatsdBackend` (statsd over UDP),
+#: `django_statsd.backends.memory.MemoryBackend` (in-memory aggregation),
+#: `django_statsd.backends.prometheus.PrometheusBackend` (served by the
+#: `django_statsd.backends.prometheus.metrics` view) and
+#: `django_statsd.backends.recording.RecordingBackend` (the default when
+#: `STATSD_RECORDING_FILE` is set)
+STATSD_BACKEND = get_setting(
+    "STATSD_BACKEND",
+    (
+        "django_statsd.backends.recording.RecordingBackend"
+        if STATSD_RECORDING_FILE
+        else "django_statsd.backends.statsd.StatsdBackend"
+    ),
+)
+
+#: Histogram buckets (in milliseconds) for the timers of the Prometheus
+#: backend
+STATSD_PROMETHEUS_BUCKETS = get_setting(
+    "STATSD_PROMETHEUS_BUCKETS",
+    (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+
+#: Precision of the HyperLogLog used to count unique values, uses
+#: `2 ** precision` bytes per set with a standard error of
+#: `1.04 / sqrt(2 ** precision)`
+STATSD_HLL_PRECISION = get_setting("STATSD_HLL_PRECISION", 12)
+
+#: Number of seconds between flushes of the process wide metrics
+STATSD_PROCESS_INTERVAL = get_setting("STATSD_PROCESS_INTERVAL", 10)
+
+#: Maximum number of distinct keys per namespace (`view`, `redis`, `celery`,
+#: `template`, `profile` and `channels`) used in metric names, keys beyond
+#: the limit are reported as `other` and counted in
+#: `statsd.cardinality_overflow.<namespace>`. Set a limit to `None` to
+#: disable it
+STATSD_CARDINALITY_LIMITS = dict(
+    {
+        "view": 1000,
+        "redis": 250,
+        "celery": 500,
+        "template": STATSD_TEMPLATE_MAX_NAMES,
+        "profile": 250,
+        "channels": 250,
+    },
+    **get_setting("STATSD_CARDINALITY_LIMITS", {})
+)
+
+#: Which keys to keep when a limit is reached: `first` keeps the first keys
+#: seen, `lru` replaces the least recently used key
+STATSD_CARDINALITY_POLICY = get_setting("STATSD_CARDINALITY_POLICY", "first")
+
+#: With the `lru` policy at most the limit of new keys are let in per this
+#: number of seconds, later new keys are reported as `other`
+STATSD_CARDINALITY_INTERVAL = get_setting("STATSD_CARDINALITY_INTERVAL", 3600)
+
+#: Keep track of how the timings are nested within a request and also send
+#: the exclusive time of every key as `self.<key>` and the time not spent in
+#: any instrumented code as `unaccounted`
+STATSD_EXCLUSIVE_TIMINGS = get_setting("STATSD_EXCLUSIVE_TIMINGS", False)
+
+#: Fraction of the requests to run the sampling profiler for, between 0
+#: (disabled) and 1
+STATSD_PROFILE_RATE = get_setting("STATSD_PROFILE_RATE", 0)
+
+#: Profiled requests taking longer than this number of seconds are reported
+STATSD_PROFILE_THRESHOLD = get_setting("STATSD_PROFILE_THRESHOLD", 1.0)
+
+#: Number of seconds between stack samples of the profiled requests
+STATSD_PROFILE_INTERVAL = get_setting("STATSD_PROFILE_INTERVAL", 0.005)
+
+#: Number of hot functions of a slow request to send as
+#: `profile.hot.<function>`
+STATSD_PROFILE_TOP = get_setting("STATSD_PROFILE_TOP", 5)
+
+#: Write the stacks of slow requests to this file in the collapsed
+#: (flamegraph) format
+STATSD_PROFILE_FILE = get_setting("STATSD_PROFILE_FILE")
+
+#: Rotate the profile file once it reaches this number of bytes
+STATSD_PROFILE_FILE_MAX_BYTES = get_setting(
+    "STATSD_PROFILE_FILE_MAX_BYTES", 10 * 1024 * 1024
+)
+
+#: Number of rotated profile files to keep
+STATSD_PROFILE_FILE_BACKUPS = get_setting("STATSD_PROFILE_FILE_BACKUPS", 5)
+
+#: Fraction of the requests to trace the memory allocations of using
+#: `tracemalloc`, sent as `memory.peak` and `memory.allocated`
+STATSD_TRACK_MEMORY_RATE = get_setting("STATSD_TRACK_MEMORY_RATE", 0)
+
+#: Send the change of the resident set size during the request as
+#: `memory.rss_delta` (Linux only)
+STATSD_TRACK_RSS = get_setting("STATSD_TRACK_RSS", False)
+
+#: Measure the garbage collection pauses per generation, both per request
+#: and for the whole process
+STATSD_TRACK_GC = get_setting("STATSD_TRACK_GC", False)
+
+#: Keep the time spent in django_statsd itself below this fraction of the
+#: request time (e.g. `0.01`) by only enabling the detailed timers (sql,
+#: redis, json, templates and cache) for some of the requests
+STATSD_OVERHEAD_BUDGET = get_setting("STATSD_OVERHEAD_BUDGET")
+
+#: The minimum fraction of the requests with the detailed timers enabled
+STATSD_OVERHEAD_MIN_RATE = get_setting("STATSD_OVERHEAD_MIN_RATE", 0.01)
+
+#: Send the time spent in django_statsd itself as `statsd.overhead`, always
+#: enabled when `STATSD_OVERHEAD_BUDGET` is set
+STATSD_TRACK_OVERHEAD = get_setting(
+    "STATSD_TRACK_OVERHEAD", bool(STATSD_OVERHEAD_BUDGET)
+)
+
+#: Send the time it took to import and initialize the apps and to serve the
+#: first request once per process
+STATSD_TRACK_STARTUP = get_setting("STATSD_TRACK_STARTUP", False)
+
+#: Send the resource usage (memory, CPU, file descriptors, threads, context
+#: switches and garbage collection) of every process from a background thread
+STATSD_TRACK_RESOURCES = get_setting("STATSD_TRACK_RESOURCES", False)
+
+#: Number of seconds between the resource usage samples
+STATSD_RESOURCES_INTERVAL = get_setting("STATSD_RESOURCES_INTERVAL", 10)
+
+#: Prefix of the resource usage metrics
+STATSD_RESOURCES_PREFIX = get_setting("STATSD_RESOURCES_PREFIX", "process.resources")
+
+#: Instrument the database connections (connect time, new and reused
+#: connections) and transactions (duration, commit/rollback time and
+#: savepoints) per database alias
+STATSD_TRACK_DATABASE = get_setting("STATSD_TRACK_DATABASE", False)
+
+#: Count the rows fetched and the model instances created by the ORM per
+#: request
+STATSD_TRACK_ORM = get_setting("STATSD_TRACK_ORM", False)
+
+#: Querysets evaluated without slicing returning more than this number of
+#: rows are counted as `orm.large_querysets`
+STATSD_ORM_LARGE_QUERYSET = get_setting("STATSD_ORM_LARGE_QUERYSET", 1000)
+
+#: Time the reading and parsing of the request body and count the uploaded
+#: files per upload handler
+STATSD_TRACK_REQUEST_BODY = get_setting("STATSD_TRACK_REQUEST_BODY", False)
+
+#: Run every management command in its own scope and send its timings as
+#: `command.<name>`
+STATSD_TRACK_COMMANDS = get_setting("STATSD_TRACK_COMMANDS", False)
+
+#: Management commands which are not instrumented, interactive and server
+#: commands would only report their total run time
+STATSD_COMMANDS_EXCLUDE = get_setting(
+    "STATSD_COMMANDS_EXCLUDE",
+    (
+        "runserver",
+        "runserver_plus",
+        "testserver",
+        "test",
+        "shell",
+        "shell_plus",
+        "dbshell",
+        "statsd_top",
+    ),
+)
+
+#: Number of seconds between the interim flushes of long running management
+#: commands, `0` to only send the metrics on exit
+STATSD_COMMANDS_FLUSH_INTERVAL = get_setting("STATSD_COMMANDS_FLUSH_INTERVAL", 60)
+
+#: Send how late celery beat sends every schedule entry as
+#: `celery.beat.<entry>.lag`
+STATSD_TRACK_CELERY_BEAT = get_setting("STATSD_TRACK_CELERY_BEAT", False)
+
+#: Send the time since the start of the workflow for tasks started by other
+#: tasks and the duration and size of chords, using custom message headers
+STATSD_TRACK_CELERY_CANVAS = get_setting("STATSD_TRACK_CELERY_CANVAS", False)
+
+#: Run every message dispatched to a Django Channels consumer in its own
+#: scope and time the channel layer calls
+STATSD_TRACK_CHANNELS = get_setting("STATSD_TRACK_CHANNELS", False)
+
+#: Time the operations of the configured file storages and count the bytes
+#: read and written per storage alias
+STATSD_TRACK_STORAGE = get_setting("STATSD_TRACK_STORAGE", False)
@@ -0,0 +1,159 @@
+"""Measure how long it takes for a process to serve its first request
+
+Enabled with `STATSD_TRACK_STARTUP`. Once `django_statsd` is loaded by
+`django.setup()` the import, models import and `ready()` of every app that
+is loaded after it are timed, so put `django_statsd` at the top of
+`INSTALLED_APPS`. Calling `install()` before `django.setup()` (e.g. in
+`wsgi.py`) also times `django.setup()` itself and all apps.
+
+When the first response of a process has been sent the following timers are
+sent once, prefixed with `startup`:
+
+- `setup`: the duration of `django.setup()`, only when `install()` was used
+- `import.<app>`, `models.<app>` and `ready.<app>` per app
+- `first_request` and `first_response`: from the start of the process to the
+  start of the first request and the end of the first response
+- `cold_request`: the duration of the first request, which is sent with
+  the other requests of its view as well
+"""
+
+import os
+import time
+import threading
+
+import django
+from django import apps as django_apps
+from django.apps import config
+
+from . import backends
+from . import settings
+
+#: Time this module was imported, used when the process start is unknown
+imported = time.time()
+
+
+class Startup(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.timings = {}
+        # The pid of the process the first request was seen for
+        self.served_pid = None
+        self.first_request = None
+
+    def add(self, key, delta):
+        self.timings[key] = delta
+
+    def cold(self, started):
+        """Return whether this is the first request of the process"""
+        if self.served_pid == os.getpid():
+            return False
+
+        with self.lock:
+            if self.served_pid == os.getpid():
+                return False
+            self.served_pid = os.getpid()
+            self.first_request = started
+        return True
+
+    def report(self, finished):
+        started = process_started() or imported
+        backend = backends.get_backend()
+        prefix = "startup"
+        if settings.STATSD_PREFIX:
+            prefix = "%s.%s" % (settings.STATSD_PREFIX, prefix)
+
+        # Apps are loaded by the parent process of prefork servers, only
+        # report them in the process that loaded them
+        if self.pid == os.getpid():
+            for key, delta in sorted(self.timings.items()):
+                backend.timer("%s.%s" % (prefix, key), delta * 1000)
+        backend.timer(
+            prefix + ".first_request", max(self.first_request - started, 0) * 1000
+        )
+        backend.timer(prefix + ".first_response", max(finished - started, 0) * 1000)
+        backend.timer(
+            prefix + ".cold_request", max(finished - self.first_request, 0) * 1000
+        )
+        backend.flush()
+
+
+startup = Startup()
+
+
+def process_started():
+    """Return the start time of this process, `None` if it is unknown
+
+    Calculated using the uptime as the boot time in `/proc/stat` is rounded
+    to seconds.
+    """
+    try:
+        with open("/proc/self/stat") as fh:
+            # The process name might contain spaces or parentheses
+            fields = fh.read().rpartition(")")[2].split()
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        ticks = int(fields[19]) / float(os.sysconf("SC_CLK_TCK"))
+    except (IOError, OSError, IndexError, ValueError, AttributeError):
+        return None
+    return time.time() - (uptime - ticks)
+
+
+def timed(key, f):
+    def _timed(*args, **kwargs):
+        start = time.time()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            startup.add(key, time.time() - start)
+
+    return _timed
+
+
+def instrument(app_config):
+    """Time the models import and `ready()` of an app config"""
+    if getattr(app_config, "statsd_patched", False):
+        return app_config
+
+    app_config.statsd_patched = True
+    app_config.import_models = timed(
+        "models.%s" % app_config.label, app_config.import_models
+    )
+    app_config.ready = timed("ready.%s" % app_config.label, app_config.ready)
+    return app_config
+
+
+def create(entry, create=config.AppConfig.create):
+    start = time.time()
+    app_config = create(entry)
+    startup.add("import.%s" % app_config.label, time.time() - start)
+    return instrument(app_config)
+
+
+def install():
+    """Start measuring before `django.setup()` is called"""
+    if getattr(django.setup, "statsd_patched", False):
+        return
+
+    setup = django.setup
+
+    def _setup(*args, **kwargs):
+        start = time.time()
+        try:
+            return setup(*args, **kwargs)
+        finally:
+            startup.add("setup", time.time() - start)
+
+    _setup.statsd_patched = True
+    django.setup = _setup
+    patch()
+
+
+def patch():
+    if not hasattr(config, "statsd_patched"):
+        config.statsd_patched = True
+        config.AppConfig.create = staticmethod(create)
+
+    # Apps loaded before django_statsd still have to run `ready()`
+    for app_config in list(django_apps.apps.app_configs.values()):
+        instrument(app_config)
@@ -0,0 +1,158 @@
+"""Instrument the configured file storages
+
+Enabled with `STATSD_TRACK_STORAGE`. The storages configured in `STORAGES`
+(including `default_storage`) are wrapped when they are first used and send
+per storage alias:
+
+- `storage.<alias>.<operation>` timers for `save`, `open`, `delete`,
+  `exists`, `listdir`, `size` and `url`
+- `storage.<alias>.bytes_written` and `storage.<alias>.bytes_read` counters
+
+Storages created by hand (e.g. passed as the `storage` of a `FileField`) can
+be wrapped with `instrument(storage, alias)`.
+"""
+
+from __future__ import absolute_import
+import django_statsd
+
+OPERATIONS = ("delete", "exists", "listdir", "size", "url")
+
+
+class StatsdFileMixin(object):
+    """Counts the bytes read from a file opened by a storage
+
+    Only `read`, `readline` and `chunks` are wrapped, the underlying `file`
+    of S3 style files is loaded lazily and must not be touched on `open()`.
+    """
+
+    statsd_alias = "default"
+    # `chunks` calls `read` internally
+    statsd_nested = False
+
+    def statsd_count(self, data):
+        if data and not self.statsd_nested:
+            django_statsd.incr("storage.%s.bytes_read" % self.statsd_alias, len(data))
+        return data
+
+    def read(self, *args, **kwargs):
+        return self.statsd_count(super(StatsdFileMixin, self).read(*args, **kwargs))
+
+    def readline(self, *args, **kwargs):
+        return self.statsd_count(super(StatsdFileMixin, self).readline(*args, **kwargs))
+
+    def chunks(self, *args, **kwargs):
+        iterator = super(StatsdFileMixin, self).chunks(*args, **kwargs)
+        while True:
+            self.statsd_nested = True
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.statsd_nested = False
+            yield self.statsd_count(chunk)
+
+
+_classes = {}
+
+
+def subclass(mixin, class_):
+    # Subclass the original class so `isinstance` checks keep working
+    if (mixin, class_) not in _classes:
+        _classes[mixin, class_] = type(
+            "Statsd%s" % class_.__name__, (mixin, class_), {}
+        )
+    return _classes[mixin, class_]
+
+
+try:
+    from asgiref.local import Local
+    from django.core import files
+    from django.core.files import storage
+
+    # The depth of the storage calls of the current thread or task
+    _local = Local()
+
+    class StatsdStorageMixin(object):
+        statsd_alias = "default"
+
+        def statsd_call(self, operation, f, *args, **kwargs):
+            # `save` calls `exists` (and some backends `size`) internally,
+            # only the outermost call is measured to prevent double counting
+            depth = getattr(_local, "depth", 0)
+            if depth:
+                return f(*args, **kwargs)
+
+            _local.depth = 1
+            try:
+                with django_statsd.with_(
+                    "storage.%s.%s" % (self.statsd_alias, operation)
+                ):
+                    return f(*args, **kwargs)
+            finally:
+                _local.depth = 0
+
+        def save(self, name, content, *args, **kwargs):
+            if not getattr(_local, "depth", 0):
+                size = getattr(content, "size", None)
+                if size:
+                    django_statsd.incr(
+                        "storage.%s.bytes_written" % self.statsd_alias, size
+                    )
+            return self.statsd_call(
+                "save",
+                super(StatsdStorageMixin, self).save,
+                name,
+                content,
+                *args,
+                **kwargs
+            )
+
+        def open(self, *args, **kwargs):
+            file = self.statsd_call(
+                "open", super(StatsdStorageMixin, self).open, *args, **kwargs
+            )
+            if isinstance(file, files.File) and not isinstance(file, StatsdFileMixin):
+                file.__class__ = subclass(StatsdFileMixin, file.__class__)
+                file.statsd_alias = self.statsd_alias
+            return file
+
+    def make_operation(operation):
+        def _operation(self, *args, **kwargs):
+            return self.statsd_call(
+                operation,
+                getattr(super(StatsdStorageMixin, self), operation),
+                *args,
+                **kwargs
+            )
+
+        _operation.__name__ = operation
+        return _operation
+
+    for operation in OPERATIONS:
+        setattr(StatsdStorageMixin, operation, make_operation(operation))
+
+    def instrument(backend, alias):
+        if not isinstance(backend, StatsdStorageMixin):
+            backend.__class__ = subclass(StatsdStorageMixin, backend.__class__)
+        backend.statsd_alias = alias
+        return backend
+
+    def getitem(self, alias):
+        return instrument(origGetItem(self, alias), alias)
+
+    origGetItem = None
+
+    def patch():
+        """Instrument the configured storages, called from the app config
+        when `STATSD_TRACK_STORAGE` is enabled"""
+        global origGetItem
+        if hasattr(storage.StorageHandler, "statsd_patched"):
+            return
+
+        storage.StorageHandler.statsd_patched = True
+        origGetItem = storage.StorageHandler.__getitem__
+        storage.StorageHandler.__getitem__ = getitem
+
+except ImportError:
+    pass
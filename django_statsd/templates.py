@@ -1,25 +1,105 @@
 from __future__ import absolute_import
+import re
+import functools
 import django_statsd
+from django_statsd.middleware import detailed, get_scope
+
+from . import cardinality
+from . import settings
+
+_template_keys = {}
+_invalid_chars = re.compile(r"[^\w-]+")
+
+
+def template_key(name):
+    """Convert a template name into a single metric path segment
+
+    The number of distinct names is limited by the ``template`` cardinality
+    guard, everything after that is collapsed into ``other``.
+    """
+    key = _template_keys.get(name)
+    if key is None:
+        key = _invalid_chars.sub("_", name or "unknown").strip("_")
+        # Bound the cache as well, not just the metric names
+        if len(_template_keys) < settings.STATSD_TEMPLATE_MAX_NAMES:
+            _template_keys[name] = key
+    return cardinality.guard("template", key)
+
+
+def template_wrapper(prefix, f, get_name):
+    @functools.wraps(f)
+    def _wrapper(self, *args, **kwargs):
+        if not detailed():
+            return f(self, *args, **kwargs)
+
+        name = template_key(get_name(self, *args, **kwargs))
+        with django_statsd.with_("%s.%s" % (prefix, name), detail=True):
+            return f(self, *args, **kwargs)
+
+    return _wrapper
+
+
+def cache_wrapper(prefix, f):
+    @functools.wraps(f)
+    def _wrapper(self, template_name, skip=None):
+        if get_scope().counter:
+            if self.cache_key(template_name, skip) in self.get_template_cache:
+                django_statsd.incr("%s.cache_hit" % prefix)
+            else:
+                django_statsd.incr("%s.cache_miss" % prefix)
+        return f(self, template_name, skip)
+
+    return _wrapper
+
 
 try:
-    from coffin.template import loader
+    from django.template import loader
 
     if not hasattr(loader, "statsd_patched"):
         loader.statsd_patched = True
         loader.render_to_string = django_statsd.named_wrapper(
-            "render_jinja", loader.render_to_string
+            "render_django", loader.render_to_string, detail=True
+        )
+
+    from django.template import base, engine
+    from django.template.loaders import cached
+
+    if not hasattr(base, "statsd_patched"):
+        base.statsd_patched = True
+        # Every render passes through here, including `TemplateResponse`,
+        # `render()` and `{% include %}`
+        base.Template.render = template_wrapper(
+            "template.django.render",
+            base.Template.render,
+            lambda self, *args, **kwargs: self.name or self.origin.template_name,
+        )
+        # Loading includes compiling when the loader cache misses
+        engine.Engine.get_template = template_wrapper(
+            "template.django.load",
+            engine.Engine.get_template,
+            lambda self, template_name: template_name,
+        )
+        cached.Loader.get_template = cache_wrapper(
+            "template.django", cached.Loader.get_template
         )
 
 except ImportError:
     pass
 
 try:
-    from django.template import loader
+    from django.template.backends import jinja2
 
-    if not hasattr(loader, "statsd_patched"):
-        loader.statsd_patched = True
-        loader.render_to_string = django_statsd.named_wrapper(
-            "render_django", loader.render_to_string
+    if not hasattr(jinja2, "statsd_patched"):
+        jinja2.statsd_patched = True
+        jinja2.Template.render = template_wrapper(
+            "template.jinja2.render",
+            jinja2.Template.render,
+            lambda self, *args, **kwargs: self.origin.template_name,
+        )
+        jinja2.Jinja2.get_template = template_wrapper(
+            "template.jinja2.load",
+            jinja2.Jinja2.get_template,
+            lambda self, template_name: template_name,
         )
 
 except ImportError:
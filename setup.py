@@ -24,7 +24,9 @@ if __name__ == "__main__":
         description=__description__,
         url=__url__,
         license="BSD",
-        packages=setuptools.find_packages(exclude=["tests", "tests.*"]),
+        packages=setuptools.find_packages(
+            exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]
+        ),
         long_description=long_description,
         tests_require=[
             "pytest",
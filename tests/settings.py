@@ -13,6 +13,8 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": "database.sqlite3",
+        # A file so the connections can be closed by the tests
+        "TEST": {"NAME": "test_database.sqlite3"},
     }
 }
 
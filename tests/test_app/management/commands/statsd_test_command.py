@@ -0,0 +1,27 @@
+from django import test
+from django.core.management.base import BaseCommand, CommandError
+
+import django_statsd
+from tests.test_app import tasks
+
+
+class Command(BaseCommand):
+    help = "Used by the tests of the command instrumentation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fail", action="store_true")
+        parser.add_argument("--request", action="store_true")
+        parser.add_argument("--task", action="store_true")
+
+    def handle(self, *args, **options):
+        with django_statsd.with_("sql"):
+            django_statsd.incr("items", 3)
+        # Requests and eager tasks run in their own scope
+        if options["request"]:
+            test.Client().get("/test_app/")
+        if options["task"]:
+            tasks.debug.delay()
+        with django_statsd.with_("after"):
+            django_statsd.incr("items_after")
+        if options["fail"]:
+            raise CommandError("Failed", returncode=2)
@@ -1,6 +1,12 @@
 from django.urls import re_path
 
-from .views import index
+from .views import async_index, echo, index, stream, upload
 
 app_name = "tests.test_app.views"
-urlpatterns = [re_path("", index, name="index")]
+urlpatterns = [
+    re_path("stream/", stream, name="stream"),
+    re_path("async/", async_index, name="async_index"),
+    re_path("upload/", upload, name="upload"),
+    re_path("echo/", echo, name="echo"),
+    re_path("", index, name="index"),
+]
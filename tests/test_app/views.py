@@ -1,5 +1,6 @@
 from django import http
 import time
+import asyncio
 
 
 def index(request, delay=None):
@@ -7,3 +8,20 @@ def index(request, delay=None):
         time.sleep(float(delay))
 
     return http.HttpResponse("Index page")
+
+
+def stream(request):
+    return http.StreamingHttpResponse(b"chunk" for _ in range(3))
+
+
+async def async_index(request):
+    await asyncio.sleep(0.01)
+    return http.HttpResponse("Index page")
+
+
+def upload(request):
+    return http.HttpResponse("%d %d" % (len(request.POST), len(request.FILES)))
+
+
+def echo(request):
+    return http.HttpResponse(request.body)
@@ -0,0 +1,99 @@
+from __future__ import with_statement
+from unittest import TestCase
+import asyncio
+import mock
+from asgiref.sync import sync_to_async
+import django_statsd
+from django_statsd import middleware
+
+
+def get_data(mock_send):
+    data = {}
+    for call in mock_send.call_args_list:
+        data.update(call[0][0])
+    return data
+
+
+def get_ms(data, key):
+    return float(data[key].split("|")[0])
+
+
+@django_statsd.decorator("service")
+async def fetch(delay):
+    await asyncio.sleep(delay)
+    return delay
+
+
+@django_statsd.decorator("service")
+async def produce(delay):
+    for i in range(3):
+        await asyncio.sleep(delay)
+        yield i
+
+
+class TestAsync(TestCase):
+    @mock.patch("statsd.Connection.send")
+    def test_coroutine(self, mock_send):
+        async def view():
+            middleware.StatsdMiddleware.start()
+            assert await fetch(0.05) == 0.05
+            async with django_statsd.with_("block"):
+                await asyncio.sleep(0.05)
+            middleware.StatsdMiddleware.stop()
+
+        asyncio.run(view())
+        data = get_data(mock_send)
+        assert get_ms(data, "prefix.view.service.fetch") >= 50
+        assert get_ms(data, "prefix.view.block") >= 50
+
+    @mock.patch("statsd.Connection.send")
+    def test_async_generator(self, mock_send):
+        async def view():
+            middleware.StatsdMiddleware.start()
+            async for i in produce(0.02):
+                # Time spent by the consumer is not counted
+                await asyncio.sleep(0.1)
+            middleware.StatsdMiddleware.stop()
+
+        asyncio.run(view())
+        data = get_data(mock_send)
+        assert 60 <= get_ms(data, "prefix.view.service.produce") < 300
+
+    @mock.patch("statsd.Connection.send")
+    def test_concurrent_scopes(self, mock_send):
+        async def view(name, delay):
+            middleware.StatsdMiddleware.start()
+            await fetch(delay)
+            middleware.StatsdMiddleware.stop(name)
+
+        async def main():
+            await asyncio.gather(view("slow", 0.1), view("fast", 0.01))
+
+        asyncio.run(main())
+        data = get_data(mock_send)
+        assert get_ms(data, "prefix.view.slow.service.fetch") >= 100
+        assert get_ms(data, "prefix.view.fast.service.fetch") < 100
+
+    @mock.patch("statsd.Connection.send")
+    def test_sync_to_async(self, mock_send):
+        async def view():
+            # Like a sync middleware the scope is started in a thread
+            await sync_to_async(middleware.StatsdMiddleware.start)()
+            async with django_statsd.with_("block"):
+                await asyncio.sleep(0.01)
+            await sync_to_async(middleware.StatsdMiddleware.stop)("sync")
+
+        asyncio.run(view())
+        data = get_data(mock_send)
+        assert get_ms(data, "prefix.view.sync.block") >= 10
+
+    @mock.patch("statsd.Connection.send")
+    def test_async_view(self, mock_send):
+        from django import test
+
+        async def request():
+            return await test.AsyncClient().get("/test_app/async/")
+
+        asyncio.run(request())
+        data = get_data(mock_send)
+        assert get_ms(data, "prefix.view.get.tests.test_app.views.async_index.total")
@@ -0,0 +1,55 @@
+from unittest import TestCase
+import mock
+from django_statsd import backends, middleware
+from django_statsd.backends import memory, prometheus, statsd
+
+
+class TestBackends(TestCase):
+    def test_memory(self):
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend):
+            middleware.StatsdMiddleware.start()
+            middleware.incr("spam", 2)
+            middleware.observe("size", 10)
+            middleware.StatsdMiddleware.stop("get", "view")
+
+        assert backend.counters == {
+            "prefix.view.get.view.hit": 1,
+            "prefix.view.get.view.spam": 2,
+            "prefix.view.site.hit": 1,
+        }
+        assert list(backend.timers) == ["prefix.view.get.view.total"]
+        assert backend.histograms == {"prefix.view.get.view.size": [10]}
+
+    def test_statsd_gauge(self):
+        connection = mock.Mock()
+        backend = statsd.StatsdBackend(connection)
+        backend.gauge("spam", 3)
+        backend.gauge("eggs", -3)
+
+        # A negative value would otherwise be applied as a decrement
+        assert connection.send.call_args_list == [
+            mock.call({"spam": "3|g"}),
+            mock.call({"eggs": "0|g"}),
+            mock.call({"eggs": "-3|g"}),
+        ]
+
+    def test_prometheus(self):
+        from django import test
+
+        backend = prometheus.PrometheusBackend()
+        backend.gauge("prefix.process.concurrency", 3)
+        with mock.patch.object(backends, "_backend", backend):
+            test.Client().get("/test_app/")
+            response = prometheus.metrics(test.RequestFactory().get("/metrics"))
+
+        lines = response.content.decode().splitlines()
+        name = "prefix_view_get_tests_test_app_views_index"
+        assert "# TYPE %s_hit counter" % name in lines
+        assert "%s_hit 1" % name in lines
+        assert "prefix_process_concurrency 3" in lines
+        assert "# TYPE %s_total histogram" % name in lines
+        assert '%s_total_bucket{le="+Inf"} 1' % name in lines
+        assert '%s_response_size_bucket{le="16"} 1' % name in lines
+        assert '%s_response_size_bucket{le="4"} 0' % name in lines
+        assert "%s_response_size_sum 10.0" % name in lines
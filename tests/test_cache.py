@@ -0,0 +1,55 @@
+from __future__ import with_statement
+from unittest import TestCase
+import mock
+from django_statsd import middleware, cache  # noqa: F401
+
+
+class TestCache(TestCase):
+    @mock.patch("statsd.Connection.send")
+    def test_cache(self, mock_send):
+        from django.core.cache import caches
+
+        def get_data():
+            data = {}
+            for call in mock_send.call_args_list:
+                data.update(call[0][0])
+            return data
+
+        backend = caches.create_connection("default")
+        assert isinstance(backend, cache.StatsdCacheMixin)
+        backend.set("a", "spam")
+
+        middleware.StatsdMiddleware.start()
+        backend.get("a")
+        backend.get("b")
+        assert backend.get_many(["a", "b", "c"]) == {"a": "spam"}
+        backend.delete("a")
+        middleware.StatsdMiddleware.stop()
+
+        data = get_data()
+        assert data["prefix.view.cache.default.hit"] == "2|c"
+        assert data["prefix.view.cache.default.miss"] == "3|c"
+        assert data["prefix.view.cache.default.get_many.keys"] == "3.00000000|ms"
+        assert data["prefix.view.cache.default.get_many.size"] == "4.00000000|ms"
+        assert set(data) >= set(
+            [
+                "prefix.view.cache.default.get",
+                "prefix.view.cache.default.get_many",
+                "prefix.view.cache.default.delete",
+            ]
+        )
+
+    def test_get_many_not_detailed(self):
+        from django.core.cache import caches
+
+        backend = caches.create_connection("default")
+        backend.set("a", "spam")
+        middleware.StatsdMiddleware.scope.timings = None
+        with mock.patch.object(cache, "value_size") as value_size:
+            backend.get_many(["a"])
+            scope = middleware.StatsdMiddleware.start()
+            scope.detailed = False
+            backend.get_many(["a"])
+            middleware.StatsdMiddleware.stop()
+
+        assert not value_size.called
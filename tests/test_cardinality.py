@@ -0,0 +1,61 @@
+from unittest import TestCase
+import mock
+from django import test
+from django_statsd import backends, cardinality
+from django_statsd.backends import memory
+
+
+class TestCardinality(TestCase):
+    def setUp(self):
+        cardinality.reset()
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cardinality.reset)
+
+    def test_first(self):
+        guard = cardinality.KeyGuard("spam", 2)
+        keys = [guard(key) for key in ("a", "b", "c", "a", "d", "b")]
+        assert keys == ["a", "b", "other", "a", "other", "b"]
+        assert len(guard) == 2
+        assert self.backend.counters == {"prefix.statsd.cardinality_overflow.spam": 2}
+
+    def test_lru(self):
+        # A new interval for every key, so every new key is let in
+        guard = cardinality.KeyGuard("spam", 2, "lru", interval=0)
+        keys = [guard(key) for key in ("a", "b", "a", "c", "b")]
+        assert keys == ["a", "b", "a", "c", "b"]
+        # `b` was evicted by `c` and `a` by `b`
+        assert list(guard.keys) == ["c", "b"]
+        assert self.backend.counters == {"prefix.statsd.cardinality_evicted.spam": 2}
+
+    @mock.patch("django_statsd.cardinality.time.monotonic")
+    def test_lru_interval(self, monotonic):
+        monotonic.return_value = 0
+        guard = cardinality.KeyGuard("spam", 2, "lru", interval=60)
+        keys = [guard(key) for key in ("a", "b", "c", "a")]
+        assert keys == ["a", "b", "other", "a"]
+
+        monotonic.return_value = 60
+        keys = [guard(key) for key in ("c", "d", "e", "c")]
+        assert keys == ["c", "d", "other", "c"]
+        assert list(guard.keys) == ["d", "c"]
+
+    def test_unlimited(self):
+        with mock.patch.dict(
+            "django_statsd.settings.STATSD_CARDINALITY_LIMITS", {"spam": None}
+        ):
+            assert cardinality.guard("spam", "eggs") == "eggs"
+            assert cardinality.get_guard("spam") is None
+
+    def test_view(self):
+        with mock.patch.dict(
+            "django_statsd.settings.STATSD_CARDINALITY_LIMITS", {"view": 1}
+        ):
+            test.Client().get("/test_app/")
+            test.Client().get("/test_app/stream/")
+
+        assert "prefix.view.get.tests.test_app.views.index.hit" in self.backend.counters
+        assert "prefix.view.get.other.hit" in self.backend.counters
+        assert self.backend.counters["prefix.statsd.cardinality_overflow.view"] == 1
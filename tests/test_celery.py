@@ -0,0 +1,110 @@
+import datetime
+import time
+from unittest import TestCase
+import mock
+from celery import beat, group
+from celery.app.task import Context
+from django_statsd import backends, celery
+from django_statsd.backends import memory
+from tests.test_app import tasks
+
+
+class TestCelery(TestCase):
+    def setUp(self):
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_beat_lag(self):
+        entry = beat.ScheduleEntry(
+            name="nightly cleanup",
+            task=tasks.debug.name,
+            schedule=datetime.timedelta(seconds=10),
+            app=tasks.app,
+        )
+        entry.last_run_at = entry.default_now() - datetime.timedelta(seconds=15)
+        apply_entry = mock.Mock()
+        celery.apply_entry_wrapper(apply_entry)(None, entry)
+
+        apply_entry.assert_called_once_with(None, entry)
+        (lag,) = self.backend.timers["prefix.celery.beat.nightly_cleanup.lag"]
+        assert 4900 < lag < 6000
+        assert self.backend.counters["prefix.celery.beat.nightly_cleanup.sent"] == 1
+
+    def test_chord(self):
+        body = tasks.debug.s()
+        run = mock.Mock()
+        celery.chord_run_wrapper(run)(
+            None, group(tasks.debug.s(), tasks.debug.s()), body
+        )
+        headers = body.options["headers"]
+        assert headers[celery.CHORD_MEMBERS] == 2
+
+        # The callback is sent by the last task of the header
+        parent = Context(headers={celery.ROOT_STARTED: headers[celery.CHORD_STARTED]})
+        celery.stamp(headers, parent)
+        assert headers[celery.ROOT_STARTED] == headers[celery.CHORD_STARTED]
+
+        task = mock.Mock(request=Context(id="b", root_id="a", headers=headers))
+        task.name = "callback"
+        celery.track_canvas(task, finished=headers[celery.SENT] + 2)
+
+        timers = self.backend.timers
+        (duration,) = timers["prefix.celery.canvas.callback.chord.duration"]
+        assert 2000 <= duration < 3000
+        assert timers["prefix.celery.canvas.callback.elapsed"] == [duration]
+        assert len(timers["prefix.celery.canvas.callback.chord.header"]) == 1
+        histograms = self.backend.histograms
+        assert histograms["prefix.celery.canvas.callback.chord.members"] == [2]
+
+    def test_group(self):
+        apply_async = mock.Mock()
+        members = group(
+            tasks.debug.s().set(headers={"spam": "eggs"}),
+            tasks.debug.s(),
+            tasks.debug.s(),
+        )
+        celery.group_apply_async_wrapper(apply_async)(members, queue="spam")
+        assert apply_async.call_args[1] == {"queue": "spam"}
+        # The headers of the members are kept
+        assert members.tasks[0].options["headers"]["spam"] == "eggs"
+        headers = members.tasks[1].options["headers"]
+        assert headers[celery.GROUP_MEMBERS] == 3
+
+        # The members of concurrent groups finish interleaved
+        for index in range(3):
+            for group_id in ("g1", "g2"):
+                task = mock.Mock(
+                    request=Context(
+                        id="b%d" % index,
+                        root_id="a",
+                        group=group_id,
+                        group_index=index,
+                        headers=headers,
+                    )
+                )
+                task.name = "member"
+                started = headers[celery.GROUP_STARTED]
+                celery.track_canvas(task, finished=started + index)
+                if index < 2:
+                    assert not self.backend.timers
+
+        # One duration per group, sent when its last member finished
+        durations = self.backend.timers["prefix.celery.canvas.member.group.duration"]
+        assert len(durations) == 2 and all(2000 <= d < 3000 for d in durations)
+        histograms = self.backend.histograms
+        assert histograms["prefix.celery.canvas.member.group.members"] == [3, 3]
+
+    def test_group_headers(self):
+        apply_async = mock.Mock()
+        members = group(tasks.debug.s().set(headers={"spam": "eggs"}))
+        celery.group_apply_async_wrapper(apply_async)(members, headers={"a": 1})
+        headers = apply_async.call_args[1]["headers"]
+        assert headers["a"] == 1 and headers[celery.GROUP_MEMBERS] == 1
+
+    def test_not_in_canvas(self):
+        task = mock.Mock(request=Context(id="a", root_id="a", headers=None))
+        task.name = "debug"
+        celery.track_canvas(task, finished=time.time())
+        assert not self.backend.timers
@@ -0,0 +1,152 @@
+import asyncio
+from unittest import TestCase
+import mock
+from django_statsd import backends, channels, middleware
+from django_statsd.backends import memory
+
+PREFIX = "prefix.channels.tests.test_channels.ChatConsumer."
+
+
+class StopConsumer(Exception):
+    pass
+
+
+class ChatConsumer(object):
+    async def dispatch(self, message):
+        with middleware.with_("sql"):
+            await asyncio.sleep(0)
+        if message.get("text") == "stop":
+            raise StopConsumer()
+        if message.get("text") == "fail":
+            raise ValueError()
+        if message.get("text") == "hang":
+            await asyncio.sleep(10)
+
+
+class TestChannels(TestCase):
+    def setUp(self):
+        self.backend = memory.MemoryBackend()
+        for patcher in (
+            mock.patch.object(backends, "_backend", self.backend),
+            # Channels is an optional dependency, only these are used
+            mock.patch.object(
+                channels,
+                "consumer",
+                mock.Mock(get_handler_name=lambda m: m["type"].replace(".", "_")),
+                create=True,
+            ),
+            mock.patch.object(
+                channels,
+                "exceptions",
+                mock.Mock(StopConsumer=StopConsumer),
+                create=True,
+            ),
+            mock.patch.object(channels, "connections", channels.Connections()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.dispatch = channels.dispatch_wrapper(ChatConsumer.dispatch)
+
+    def test_get_size(self):
+        assert channels.get_size({"text": "h\xe9"}) == 3
+        assert channels.get_size({"bytes": b"spam"}) == 4
+        assert channels.get_size({"type": "websocket.connect"}) is None
+
+    def test_connections(self):
+        with mock.patch.object(channels.process, "gauge") as gauge:
+            channels.connections.change("chat", 1)
+            channels.connections.change("chat", 1)
+            channels.connections.change("chat", -1)
+            channels.connections.change("other", -1)
+
+        assert gauge.call_args_list == [
+            mock.call("channels.chat.connections", 1),
+            mock.call("channels.chat.connections", 2),
+            mock.call("channels.chat.connections", 1),
+            mock.call("channels.other.connections", 0),
+        ]
+
+    def test_dispatch(self):
+        consumer = ChatConsumer()
+        with mock.patch.object(channels.process, "gauge") as gauge:
+            asyncio.run(self.dispatch(consumer, {"type": "websocket.connect"}))
+            asyncio.run(
+                self.dispatch(consumer, {"type": "websocket.receive", "text": "spam"})
+            )
+            with self.assertRaises(StopConsumer):
+                asyncio.run(
+                    self.dispatch(
+                        consumer, {"type": "websocket.receive", "text": "stop"}
+                    )
+                )
+            with self.assertRaises(ValueError):
+                asyncio.run(
+                    self.dispatch(
+                        consumer, {"type": "websocket.receive", "text": "fail"}
+                    )
+                )
+            asyncio.run(self.dispatch(consumer, {"type": "websocket.disconnect"}))
+
+        gauge.assert_called_with(
+            "channels.tests.test_channels.ChatConsumer.connections", 0
+        )
+        counters = self.backend.counters
+        assert counters[PREFIX + "websocket_connect.hit"] == 1
+        assert counters[PREFIX + "websocket_receive.hit"] == 3
+        assert counters[PREFIX + "websocket_receive.messages.received"] == 3
+        assert counters[PREFIX + "websocket_receive.fail"] == 1
+        assert self.backend.histograms[PREFIX + "websocket_receive.received_size"] == [
+            4,
+            4,
+            4,
+        ]
+        assert len(self.backend.timers[PREFIX + "websocket_receive.sql"]) == 3
+        assert len(self.backend.timers[PREFIX + "websocket_disconnect.total"]) == 1
+
+    def test_cancelled(self):
+        async def run():
+            task = asyncio.ensure_future(
+                self.dispatch(
+                    ChatConsumer(), {"type": "websocket.receive", "text": "hang"}
+                )
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert len(self.backend.timers[PREFIX + "websocket_receive.total"]) == 1
+
+    def test_layer(self):
+        async def send(channel, message):
+            await asyncio.sleep(0)
+
+        async def run():
+            scope = middleware.StatsdMiddleware.start("channels")
+            await channels.layer_wrapper("default", "send", send)("chat", {})
+            assert scope.timings.data["channel_layer.send"] > 0
+            middleware.StatsdMiddleware.stop("consumer")
+            middleware.StatsdMiddleware.scope.timings = None
+
+        asyncio.run(run())
+        assert len(self.backend.timers["prefix.channels.layer.default.send"]) == 1
+        assert (
+            len(self.backend.timers["prefix.channels.consumer.channel_layer.send"]) == 1
+        )
+
+    def test_send(self):
+        async def send(self, message):
+            pass
+
+        async def run():
+            middleware.StatsdMiddleware.start("channels")
+            wrapped = channels.async_send_wrapper(send)
+            await wrapped(None, {"type": "websocket.send", "bytes": b"eggs"})
+            await wrapped(None, {"type": "websocket.close"})
+            middleware.StatsdMiddleware.stop("consumer")
+            middleware.StatsdMiddleware.scope.timings = None
+
+        asyncio.run(run())
+        assert self.backend.counters["prefix.channels.consumer.messages.sent"] == 1
+        assert self.backend.histograms["prefix.channels.consumer.sent_size"] == [4]
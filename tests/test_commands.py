@@ -0,0 +1,64 @@
+from unittest import TestCase
+import mock
+from django.core import management
+from django_statsd import backends, commands, middleware
+from django_statsd.backends import memory
+
+PREFIX = "prefix.command.statsd_test_command."
+
+
+class TestCommands(TestCase):
+    def setUp(self):
+        commands.patch()
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_command(self):
+        management.call_command("statsd_test_command")
+
+        assert self.backend.counters[PREFIX + "hit"] == 1
+        assert self.backend.counters[PREFIX + "items"] == 3
+        assert self.backend.counters[PREFIX + "exit.0"] == 1
+        for key in ("total", "cpu", "sql"):
+            assert len(self.backend.timers[PREFIX + key]) == 1
+        assert middleware.StatsdMiddleware.scope.timings is None
+
+    def test_nested_scopes(self):
+        management.call_command("statsd_test_command", request=True, task=True)
+
+        assert self.backend.counters[PREFIX + "exit.0"] == 1
+        assert len(self.backend.timers[PREFIX + "total"]) == 1
+        # Recorded after the request and task finished
+        assert len(self.backend.timers[PREFIX + "after"]) == 1
+        assert self.backend.counters[PREFIX + "items_after"] == 1
+        assert self.backend.counters["prefix.view.get.tests.test_app.views.index.hit"]
+        assert self.backend.counters[
+            "prefix.celery.tests.test_app.tasks.debug.queue_celery.hit"
+        ]
+
+    def test_failure(self):
+        with self.assertRaises(management.CommandError):
+            management.call_command("statsd_test_command", fail=True)
+
+        assert self.backend.counters[PREFIX + "exit.2"] == 1
+        assert self.backend.counters[PREFIX + "fail"] == 1
+        assert len(self.backend.timers[PREFIX + "total"]) == 1
+
+    def test_interim_flush(self):
+        scope = middleware.StatsdMiddleware.start("command")
+        command = commands.CommandScope("statsd_test_command", scope)
+        middleware.incr("items")
+        with middleware.with_("sql"):
+            pass
+        command.flush()
+        middleware.incr("items")
+        command.flush()
+        command.stop(0)
+        middleware.StatsdMiddleware.scope.timings = None
+
+        assert self.backend.counters[PREFIX + "hit"] == 1
+        assert self.backend.counters[PREFIX + "items"] == 2
+        assert len(self.backend.timers[PREFIX + "sql"]) == 1
+        assert len(self.backend.timers[PREFIX + "total"]) == 1
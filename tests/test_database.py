@@ -0,0 +1,62 @@
+from django import test
+from django.db import connection, transaction
+import mock
+from django_statsd import backends, database, middleware
+from django_statsd.backends import memory
+
+
+class TestDatabase(test.TransactionTestCase):
+    def setUp(self):
+        database.patch()
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+
+    def test_connections(self):
+        connection.close()
+        middleware.StatsdMiddleware.start()
+        connection.cursor().close()
+        connection.cursor().close()
+        middleware.StatsdMiddleware.stop("first")
+
+        middleware.StatsdMiddleware.start()
+        connection.cursor().close()
+        connection.cursor().close()
+        middleware.StatsdMiddleware.stop("second")
+
+        counters = self.backend.counters
+        assert counters["prefix.view.first.db.default.connection.new"] == 1
+        assert "prefix.view.first.db.default.connection.reused" not in counters
+        assert counters["prefix.view.second.db.default.connection.reused"] == 1
+        assert "prefix.view.first.db.default.connect" in self.backend.timers
+
+    def test_transactions(self):
+        middleware.StatsdMiddleware.start()
+        with transaction.atomic():
+            with transaction.atomic():
+                pass
+            with transaction.atomic(savepoint=False):
+                pass
+            try:
+                with transaction.atomic():
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        try:
+            with transaction.atomic():
+                with transaction.atomic(savepoint=False):
+                    raise ValueError()
+        except ValueError:
+            pass
+        middleware.StatsdMiddleware.stop("view")
+
+        prefix = "prefix.view.view.db.default."
+        counters = self.backend.counters
+        assert counters[prefix + "savepoint.created"] == 2
+        assert counters[prefix + "savepoint.rollback"] == 1
+        assert len(self.backend.histograms[prefix + "transaction.duration"]) == 2
+        assert prefix + "transaction.commit" in self.backend.timers
+        assert prefix + "transaction.rollback" in self.backend.timers
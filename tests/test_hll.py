@@ -0,0 +1,65 @@
+from unittest import TestCase
+import mock
+from django_statsd import backends, hll, middleware, process
+from django_statsd.backends import memory
+
+
+class TestHyperLogLog(TestCase):
+    def test_exact_small(self):
+        counter = hll.HyperLogLog()
+        for i in range(200):
+            counter.add("user-%d" % (i % 50))
+        assert counter.registers is None
+        assert len(counter) == 50
+
+    def test_accuracy(self):
+        for n in (1000, 10000, 100000):
+            counter = hll.HyperLogLog()
+            for i in range(n):
+                counter.add(i)
+            assert abs(counter.count() - n) / float(n) < 0.05, (n, counter.count())
+
+    def test_merge(self):
+        a = hll.HyperLogLog()
+        b = hll.HyperLogLog()
+        for i in range(5000):
+            a.add(i)
+            b.add(i + 2500)
+        a.merge(b)
+        assert abs(a.count() - 7500) / 7500.0 < 0.05
+
+        with self.assertRaises(ValueError):
+            a.merge(hll.HyperLogLog(10))
+
+
+class TestGaugesAndSets(TestCase):
+    def test_request(self):
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend):
+            middleware.StatsdMiddleware.start()
+            middleware.gauge("queue", 3)
+            middleware.gauge("queue", 5)
+            for i in range(10):
+                middleware.unique("users", i % 4)
+            middleware.StatsdMiddleware.stop("get", "view")
+
+        assert backend.gauges["prefix.view.get.view.queue"] == 5
+        assert backend.gauges["prefix.view.get.view.users"] == 4
+
+    def test_process(self):
+        backend = memory.MemoryBackend()
+        metrics = process.ProcessMetrics(10)
+        with mock.patch.object(backends, "_backend", backend), mock.patch.object(
+            metrics, "ensure_running"
+        ):
+            metrics.gauge("workers", 4)
+            metrics.incr("jobs", 2)
+            for i in range(100):
+                metrics.unique("users", i)
+            metrics.sample()
+
+        assert backend.gauges == {
+            "prefix.process.workers": 4,
+            "prefix.process.users": 100,
+        }
+        assert backend.counters == {"prefix.process.jobs": 2}
@@ -0,0 +1,53 @@
+import gc
+from unittest import TestCase
+import mock
+from django_statsd import backends, memory, middleware
+from django_statsd.backends import memory as memory_backend
+
+
+class TestMemory(TestCase):
+    def setUp(self):
+        self.backend = memory_backend.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request(self):
+        with mock.patch.multiple(
+            "django_statsd.settings", STATSD_TRACK_MEMORY_RATE=1, STATSD_TRACK_RSS=True
+        ):
+            middleware.StatsdMiddleware.start()
+            data = [bytearray(1024) for i in range(1000)]
+            del data
+            middleware.StatsdMiddleware.stop("get", "view")
+
+        histograms = self.backend.histograms
+        assert histograms["prefix.view.get.view.memory.peak"][0] > 1024 * 1000
+        assert histograms["prefix.view.get.view.memory.allocated"][0] < 1024 * 1000
+        assert len(histograms["prefix.view.get.view.memory.rss_delta"]) == 1
+
+    def test_not_found(self):
+        from django import test
+
+        with mock.patch.multiple("django_statsd.settings", STATSD_TRACK_MEMORY_RATE=1):
+            response = test.Client().get("/missing/")
+
+        assert response.status_code == 404
+        assert memory.tracer.users == 0
+        assert not memory.tracemalloc.is_tracing()
+
+    def test_gc(self):
+        monitor = memory.GCMonitor(60)
+        monitor.scope = middleware.StatsdMiddleware.start()
+        monitor.install()
+        try:
+            gc.collect()
+        finally:
+            monitor.uninstall()
+
+        assert monitor.scope.timings.data["gc.gen2"] > 0
+        middleware.StatsdMiddleware.stop("get", "view")
+        monitor.sample()
+        assert self.backend.counters["prefix.process.gc.gen2.collections"] == 1
+        assert "prefix.process.gc.gen2" in self.backend.timers
+        assert "prefix.view.get.view.gc.gen2" in self.backend.timers
@@ -0,0 +1,135 @@
+from __future__ import with_statement
+from unittest import TestCase
+import mock
+
+
+def get_data(mock_send):
+    data = {}
+    for call in mock_send.call_args_list:
+        data.update(call[0][0])
+    return data
+
+
+class TestStreaming(TestCase):
+    @mock.patch("statsd.Connection.send")
+    def test_streaming(self, mock_send):
+        from django import test
+
+        response = test.Client().get("/test_app/stream/")
+        prefix = "prefix.view.get.tests.test_app.views.stream."
+        assert prefix + "total" in get_data(mock_send)
+        assert prefix + "stream_total" not in get_data(mock_send)
+
+        assert b"".join(response.streaming_content) == b"chunk" * 3
+        response.close()
+        data = get_data(mock_send)
+        assert data[prefix + "stream_bytes"] == "15|c"
+        assert data[prefix + "response_size"] == "15.00000000|ms"
+        assert prefix + "stream_first_chunk" in data
+        assert prefix + "stream_total" in data
+
+    @mock.patch("statsd.Connection.send")
+    def test_response_size(self, mock_send):
+        from django import test
+
+        test.Client().get("/test_app/")
+        data = get_data(mock_send)
+        key = "prefix.view.get.tests.test_app.views.index.response_size"
+        assert data[key] == "10.00000000|ms"
+
+
+class TestQueueTime(TestCase):
+    def test_parse(self):
+        from django_statsd.middleware import parse_request_start
+
+        assert parse_request_start("t=1500000000.25") == 1500000000.25
+        assert parse_request_start("1500000000") == 1500000000
+        assert parse_request_start("1500000000250") == 1500000000.25
+        assert parse_request_start("t=1500000000250000") == 1500000000.25
+        assert abs(parse_request_start("1500000000250000000") - 1500000000.25) < 1e-6
+        assert parse_request_start("t=") is None
+
+    @mock.patch("statsd.Connection.send")
+    def test_queue_time(self, mock_send):
+        import time
+        from django import test
+
+        queued = "t=%d" % ((time.time() - 0.5) * 1e6)
+        test.Client().get("/test_app/", HTTP_X_REQUEST_START=queued)
+        data = get_data(mock_send)
+        for key in (
+            "prefix.view.get.tests.test_app.views.index.queue_time",
+            "prefix.view.site.queue_time",
+        ):
+            assert 500 <= float(data[key].split("|")[0]) < 1500
+
+    @mock.patch("statsd.Connection.send")
+    def test_clock_skew(self, mock_send):
+        import time
+        from django import test
+
+        queued = "%d" % ((time.time() + 10) * 1e3)
+        test.Client().get("/test_app/", HTTP_X_QUEUE_START=queued)
+        data = get_data(mock_send)
+        assert data["prefix.view.site.queue_time"] == "0.00000000|ms"
+
+        mock_send.reset_mock()
+        test.Client().get("/test_app/", HTTP_X_QUEUE_START="t=1000000000")
+        assert "prefix.view.site.queue_time" not in get_data(mock_send)
+
+
+class TestConcurrency(TestCase):
+    @mock.patch("statsd.Connection.send")
+    def test_concurrency(self, mock_send):
+        from django_statsd import concurrency
+
+        tracker = concurrency.ConcurrencyTracker(60, threads=2)
+        tracker.ensure_running = lambda: None
+        tracker.enter()
+        tracker.enter()
+        tracker.leave()
+        tracker.sample()
+        tracker.enter()
+        tracker.sample()
+
+        data = mock_send.call_args_list
+        assert data[0][0][0] == {"prefix.process.concurrency.current": "1|g"}
+        assert data[1][0][0] == {"prefix.process.concurrency.peak": "2|g"}
+        assert data[4][0][0] == {"prefix.process.concurrency.current": "2|g"}
+        assert data[5][0][0] == {"prefix.process.concurrency.peak": "2|g"}
+        average = float(data[6][0][0]["prefix.process.concurrency.average"][:-2])
+        utilization = float(data[7][0][0]["prefix.process.utilization"][:-2])
+        assert 0 <= average <= 2
+        assert abs(utilization - average / 2) < 0.001
+
+
+class TestExclusiveTimings(TestCase):
+    @mock.patch("django_statsd.middleware.time.time")
+    def test_spans(self, mock_time):
+        from django_statsd import middleware
+
+        timer = middleware.Timer("view", spans=True)
+        # total 0-10, render 1-7, sql 2-5 inside render, sql 8-9
+        for now, action, key in (
+            (0, "start", "total"),
+            (1, "start", "render"),
+            (2, "start", "sql"),
+            (5, "stop", "sql"),
+            (7, "stop", "render"),
+            (8, "start", "sql"),
+            (9, "stop", "sql"),
+            (10, "stop", "total"),
+        ):
+            mock_time.return_value = now
+            getattr(timer, action)(key)
+
+        assert timer.data == {"total": 10, "render": 6, "sql": 4}
+        assert timer.exclusive == {"total": 3, "render": 3, "sql": 4}
+
+        with mock.patch("statsd.Connection.send") as mock_send:
+            timer.submit("get", "view")
+        data = get_data(mock_send)
+        assert data["prefix.view.get.view.unaccounted"] == "3000.00000000|ms"
+        assert data["prefix.view.get.view.self.render"] == "3000.00000000|ms"
+        assert data["prefix.view.get.view.render"] == "6000.00000000|ms"
+        assert "prefix.view.get.view.self.total" not in data
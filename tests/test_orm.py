@@ -0,0 +1,37 @@
+from django import test
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+import mock
+from django_statsd import backends, middleware, orm
+from django_statsd.backends import memory
+
+
+class TestORM(test.TransactionTestCase):
+    def setUp(self):
+        orm.patch()
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close)
+
+    def test_rows(self):
+        total = ContentType.objects.count()
+        with mock.patch.multiple(
+            "django_statsd.settings", STATSD_ORM_LARGE_QUERYSET=total - 1
+        ):
+            middleware.StatsdMiddleware.start()
+            list(ContentType.objects.all())
+            list(ContentType.objects.all()[:total])
+            list(ContentType.objects.values_list("pk", flat=True))
+            list(ContentType.objects.iterator(chunk_size=2))
+            ContentType.objects.count()
+            middleware.StatsdMiddleware.stop("view")
+
+        counters = self.backend.counters
+        assert counters["prefix.view.view.orm.rows"] == total * 4 + 1
+        assert counters["prefix.view.view.orm.instances.contenttypes.contenttype"] == (
+            total * 3
+        )
+        # Only the unsliced model and values querysets
+        assert counters["prefix.view.view.orm.large_querysets"] == 2
@@ -0,0 +1,77 @@
+import json
+import time
+from unittest import TestCase
+import mock
+from django_statsd import backends, middleware, overhead
+from django_statsd.backends import memory
+
+
+class TestOverhead(TestCase):
+    def test_budget(self):
+        budget = overhead.OverheadBudget(0.01, min_rate=0.1, window=10)
+        for i in range(10):
+            budget.update(0.002, 0.1)
+        assert budget.rate == 0.5
+        for i in range(30):
+            budget.update(0.002, 0.1)
+        assert budget.rate == 0.1
+        for i in range(10):
+            budget.update(0.0001, 0.1)
+        assert budget.rate == 0.125
+
+    def test_report(self):
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend), mock.patch.multiple(
+            "django_statsd.settings", STATSD_TRACK_OVERHEAD=True
+        ):
+            middleware.StatsdMiddleware.start()
+            with middleware.with_("spam"):
+                pass
+            middleware.StatsdMiddleware.stop("get", "view")
+
+        assert len(backend.timers["prefix.view.get.view.statsd.overhead"]) == 1
+
+    def test_accuracy(self):
+        def measure(count=2000):
+            started = time.perf_counter()
+            for i in range(count):
+                pass
+            baseline = time.perf_counter() - started
+
+            scope = middleware.StatsdMiddleware.start()
+            reported = scope.timings.overhead
+            started = time.perf_counter()
+            for i in range(count):
+                with middleware.with_("spam"):
+                    pass
+                middleware.incr("eggs")
+            spent = time.perf_counter() - started - baseline
+            reported = scope.timings.overhead - reported
+            middleware.StatsdMiddleware.stop("get", "view")
+            return reported / spent
+
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend), mock.patch.multiple(
+            "django_statsd.settings", STATSD_TRACK_OVERHEAD=True
+        ):
+            # Only the calls of the helpers themselves are not measured, the
+            # best of a few runs to ignore the noise of other processes
+            ratio = max(measure() for i in range(3))
+
+        assert 0.4 < ratio < 1.1
+
+    def test_detail(self):
+        backend = memory.MemoryBackend()
+        budget = overhead.OverheadBudget(0.01)
+        budget.rate = 0.0
+        with mock.patch.object(backends, "_backend", backend), mock.patch.object(
+            overhead, "budget", budget
+        ):
+            middleware.StatsdMiddleware.start()
+            json.dumps({})
+            with middleware.with_("spam"):
+                pass
+            middleware.StatsdMiddleware.stop("get", "view")
+
+        assert "prefix.view.get.view.spam" in backend.timers
+        assert "prefix.view.get.view.json.dumps" not in backend.timers
@@ -1,20 +1,30 @@
 from __future__ import with_statement
 from unittest import TestCase
 import mock
-from django_statsd import middleware
+from django_statsd import backends, middleware
 from .test_app.tasks import debug
 
 
 class TestPrefix(TestCase):
-    @mock.patch("statsd.Client")
-    def test_prefix(self, mock_client):
+    def setUp(self):
+        from django import test
+
+        # The first request of the process imports modules with side effects
+        # (e.g. the messages storage calls `json.dumps`), which depends on
+        # the tests that ran before
+        with mock.patch("statsd.Connection.send"):
+            test.Client().get("/test_app/")
+        patcher = mock.patch.object(backends, "_backend", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("statsd.Connection.send")
+    def test_prefix(self, mock_send):
         from django import test
 
         def get_keys():
             return set(
-                sum(
-                    [list(x[0][1].keys()) for x in mock_client._send.call_args_list], []
-                )
+                sum([list(x[0][0].keys()) for x in mock_send.call_args_list], [])
             )
 
         middleware.StatsdMiddleware.start()
@@ -35,8 +45,8 @@ class TestPrefix(TestCase):
                 "prefix.view.get.tests.test_app.views.index.process_request",
                 "prefix.view.get.tests.test_app.views.index.process_response",
                 "prefix.view.get.tests.test_app.views.index.process_view",
+                "prefix.view.get.tests.test_app.views.index.response_size",
                 "prefix.view.get.tests.test_app.views.index.total",
-                "prefix.view.get.tests.test_app.views.index.json.dumps",
                 "prefix.view.hit",
                 "prefix.view.site.hit",
                 "prefix.view.total",
@@ -45,13 +55,11 @@ class TestPrefix(TestCase):
 
 
 class TestCeleryTasks(TestCase):
-    @mock.patch("statsd.Client")
-    def test_tasks(self, mock_client):
+    @mock.patch("statsd.Connection.send")
+    def test_tasks(self, mock_send):
         def get_keys():
             return set(
-                sum(
-                    [list(x[0][1].keys()) for x in mock_client._send.call_args_list], []
-                )
+                sum([list(x[0][0].keys()) for x in mock_send.call_args_list], [])
             )
 
         debug.delay()
@@ -0,0 +1,104 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+from unittest import TestCase
+import mock
+from django_statsd import backends, middleware, profiler
+from django_statsd.backends import memory
+
+
+def busy_loop(seconds):
+    stop_at = time.time() + seconds
+    while time.time() < stop_at:
+        pass
+
+
+class TestProfiler(TestCase):
+    def test_profile(self):
+        sampler = profiler.StackSampler(0.001)
+        self.addCleanup(sampler.stop)
+        profile = sampler.start_profile()
+        busy_loop(0.2)
+        sampler.stop_profile(profile)
+
+        assert profile.samples > 10
+        functions = dict(profile.hot_functions(3))
+        assert functions.get("tests.test_profiler:busy_loop"), functions
+        line = next(profile.collapsed("view"))
+        assert line.startswith("view;")
+        assert "tests.test_profiler:test_profile;tests.test_profiler:busy_loop" in line
+
+    def test_stop_idle(self):
+        sampler = profiler.StackSampler(0.001)
+        sampler.stop_profile(sampler.start_profile())
+        thread = sampler.thread
+        # Let the thread wait for the next profile
+        time.sleep(0.05)
+        sampler.stop()
+        thread.join(1)
+        assert not thread.is_alive()
+
+    def test_report(self):
+        profile = profiler.Profile(0)
+        profile.stacks[("app:view", "app:slow")] = 3
+        profile.stacks[("app:view",)] = 1
+        profile.samples = 4
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        counter = middleware.Counter()
+        with mock.patch.multiple(
+            "django_statsd.settings", STATSD_PROFILE_FILE=path
+        ), mock.patch.object(profiler.stacks_logger, "handlers", []):
+            profiler.report(profile, counter, "get.view")
+            for handler in profiler.stacks_logger.handlers:
+                handler.close()
+
+        assert counter.data == {
+            "profile.slow": 1,
+            "profile.samples": 4,
+            "profile.hot.app_slow": 3,
+            "profile.hot.app_view": 1,
+        }
+        with open(path) as fh:
+            assert fh.read().splitlines() == [
+                "get.view;app:view;app:slow 3",
+                "get.view;app:view 1",
+            ]
+
+    def test_stacks_logger(self):
+        def create(*args, **kwargs):
+            time.sleep(0.01)
+            return logging.NullHandler()
+
+        threads = [
+            threading.Thread(target=profiler.get_stacks_logger) for i in range(5)
+        ]
+        with mock.patch.multiple(
+            "django_statsd.settings", STATSD_PROFILE_FILE="stacks.txt"
+        ), mock.patch.object(profiler.stacks_logger, "handlers", []), mock.patch.object(
+            profiler.handlers, "RotatingFileHandler", side_effect=create
+        ):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(profiler.stacks_logger.handlers) == 1
+
+    def test_middleware(self):
+        from django import test
+
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend), mock.patch.multiple(
+            "django_statsd.settings",
+            STATSD_PROFILE_RATE=1,
+            STATSD_PROFILE_THRESHOLD=0,
+        ):
+            test.Client().get("/test_app/")
+
+        name = "prefix.view.get.tests.test_app.views.index"
+        assert backend.counters["%s.profile.slow" % name] == 1
+        assert not profiler.stack_sampler.profiles
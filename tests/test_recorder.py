@@ -0,0 +1,76 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+import mock
+from django.core import management
+from django_statsd import backends, middleware, recorder
+from django_statsd.backends import recording
+
+
+class TestRecorder(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_ring(self):
+        path = os.path.join(self.path, "ring")
+        writer = recorder.RingWriter(path, 4)
+        backend = recording.RecordingBackend(writer)
+        for i in range(6):
+            backend.timer("spam", i + 0.5)
+            backend.counter("eggs", 1)
+        backend.set("set", "member")
+        backend.counter("rate", 2)
+        writer.close()
+
+        reader = recorder.RingReader(path)
+        assert len(reader) == 4
+        records = list(reader)
+        assert [r[1:] for r in records] == [
+            ("eggs", 1.0, "c"),
+            ("spam", 5.5, "ms"),
+            ("eggs", 1.0, "c"),
+            ("rate", 2.0, "c"),
+        ]
+        summary = reader.summary()
+        assert summary["eggs"]["count"] == 2
+        assert summary["spam"]["p50"] == 5.5
+
+        fh = io.StringIO()
+        reader.export_csv(fh)
+        assert fh.getvalue().splitlines()[1].endswith(",eggs,1.0,c")
+
+        output = os.path.join(self.path, "ring.json")
+        management.call_command("statsd_export", path, format="json", output=output)
+        with open(output) as fh:
+            lines = fh.read().split("\n")
+        # One record per line, the last one ends with a newline
+        assert len(lines) == 5 and lines[-1] == ""
+        assert json.loads(lines[0])["name"] == "eggs"
+
+    def test_middleware(self):
+        path = os.path.join(self.path, "statsd-%(pid)s.ring")
+        with mock.patch.multiple(
+            recorder.settings,
+            STATSD_RECORDING_FILE=path,
+            STATSD_RECORDING_CAPACITY=100,
+        ), mock.patch.object(recorder, "_writer", None), mock.patch.object(
+            backends, "_backend", recording.RecordingBackend()
+        ):
+            middleware.StatsdMiddleware.start()
+            middleware.StatsdMiddleware.stop("get", "view")
+            recorder.get_writer().close()
+
+        reader = recorder.RingReader(path % dict(pid=os.getpid()))
+        assert set(name for _, name, _, _ in reader) == set(
+            [
+                "prefix.view.get.view.total",
+                "prefix.view.get.view.hit",
+                "prefix.view.site.hit",
+            ]
+        )
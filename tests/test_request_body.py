@@ -0,0 +1,53 @@
+from unittest import TestCase
+import mock
+from django import test
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django_statsd import backends, request_body
+from django_statsd.backends import memory
+
+
+def upload(size):
+    return test.Client().post(
+        "/test_app/upload/",
+        dict(name="spam", upload=SimpleUploadedFile("upload.txt", b"x" * size)),
+    )
+
+
+class TestRequestBody(TestCase):
+    def test_upload(self):
+        request_body.patch()
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend):
+            response = upload(10)
+            # Uploads larger than this are written to a temporary file
+            with test.override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1000):
+                upload(2000)
+
+        assert response.content == b"1 1"
+        prefix = "prefix.view.post.tests.test_app.views.upload."
+        assert backend.counters[prefix + "request.upload.memory"] == 1
+        assert backend.counters[prefix + "request.upload.temporary"] == 1
+        sizes = backend.histograms[prefix + "request.body_size"]
+        assert len(sizes) == 2 and sizes[1] > 2000
+        assert len(backend.histograms[prefix + "request.upload_rate"]) == 2
+        assert len(backend.timers[prefix + "request.parse"]) == 2
+
+    def test_body(self):
+        request_body.patch()
+        backend = memory.MemoryBackend()
+        with mock.patch.object(backends, "_backend", backend):
+            response = test.Client().post(
+                "/test_app/echo/", b'{"spam": 1}', content_type="application/json"
+            )
+            test.Client().post(
+                "/test_app/upload/",
+                "name=spam",
+                content_type="application/x-www-form-urlencoded",
+            )
+
+        assert response.content == b'{"spam": 1}'
+        prefix = "prefix.view.post.tests.test_app.views."
+        assert backend.histograms[prefix + "echo.request.body_size"] == [11]
+        assert len(backend.timers[prefix + "echo.request.read_body"]) == 1
+        # Form bodies are read by the parser, only measured once
+        assert backend.histograms[prefix + "upload.request.body_size"] == [9]
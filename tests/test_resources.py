@@ -0,0 +1,31 @@
+import gc
+from unittest import TestCase
+import mock
+from django_statsd import backends, resources
+from django_statsd.backends import memory
+
+
+class TestResources(TestCase):
+    def test_sample(self):
+        backend = memory.MemoryBackend()
+        collector = resources.ResourceCollector(60)
+        gc.collect()
+        with mock.patch.object(backends, "_backend", backend):
+            collector.sample()
+
+        prefix = "prefix.process.resources."
+        gauges = backend.gauges
+        assert gauges[prefix + "rss"] > 0
+        assert gauges[prefix + "fds"] > 0
+        assert gauges[prefix + "threads"] >= 1
+        assert 0 <= gauges[prefix + "cpu.total"]
+        assert prefix + "gc.gen0.objects" in gauges
+        assert backend.counters[prefix + "gc.gen2.collections"] >= 1
+        assert prefix + "context_switches.voluntary" in backend.counters
+
+    def test_fork(self):
+        collector = resources.ResourceCollector(60)
+        collector.enabled = True
+        with mock.patch.object(collector, "ensure_running") as ensure_running:
+            collector.after_fork()
+        ensure_running.assert_called_once_with()
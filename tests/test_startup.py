@@ -0,0 +1,47 @@
+import time
+from unittest import TestCase
+import mock
+from django import test
+from django.apps import apps
+from django_statsd import backends, startup
+from django_statsd.backends import memory
+
+
+class TestStartup(TestCase):
+    def test_process_started(self):
+        started = startup.process_started()
+        assert started is not None
+        assert time.time() - 86400 * 365 < started <= startup.imported + 1
+
+    def test_apps(self):
+        with mock.patch.object(startup, "startup", startup.Startup()):
+            app_config = startup.create("tests.test_app")
+            app_config.apps = apps
+            app_config.import_models()
+            app_config.ready()
+            timings = startup.startup.timings
+
+        assert sorted(timings) == [
+            "import.test_app",
+            "models.test_app",
+            "ready.test_app",
+        ]
+
+    def test_cold(self):
+        backend = memory.MemoryBackend()
+        instance = startup.Startup()
+        instance.add("ready.spam", 0.5)
+        with mock.patch.object(backends, "_backend", backend), mock.patch.object(
+            startup, "startup", instance
+        ), mock.patch.multiple("django_statsd.settings", STATSD_TRACK_STARTUP=True):
+            test.Client().get("/test_app/")
+            test.Client().get("/test_app/")
+
+        name = "prefix.view.get.tests.test_app.views.index."
+        assert backend.counters[name + "hit"] == 2
+        assert len(backend.timers[name + "total"]) == 2
+        assert not [key for key in backend.counters if "cold" in key]
+        assert backend.timers["prefix.startup.ready.spam"] == [500.0]
+        assert len(backend.timers["prefix.startup.first_request"]) == 1
+        assert len(backend.timers["prefix.startup.first_response"]) == 1
+        assert len(backend.timers["prefix.startup.cold_request"]) == 1
@@ -0,0 +1,32 @@
+from unittest import TestCase
+from django_statsd.management.commands import statsd_top
+
+
+class TestAggregator(TestCase):
+    def test_aggregator(self):
+        aggregator = statsd_top.Aggregator()
+        # Sub keys are sent before the total of a request
+        aggregator.feed(b"prefix.view.get.app.views.index.sql.default:30|ms")
+        aggregator.feed(b"prefix.view.get.app.views.index.redis.get:10|ms")
+        aggregator.feed(b"prefix.view.get.app.views.index.total:100|ms")
+        aggregator.feed(b"prefix.view.get.app.views.index.hit:1|c")
+        aggregator.feed(
+            b"prefix.view.get.app.views.index.sql.default:50|ms\n"
+            b"prefix.view.get.app.views.index.total:100|ms|@0.5"
+        )
+        aggregator.feed(b"prefix.view.site.hit:1|c")
+        aggregator.feed(b"other.view.get.app.views.index.total:100|ms")
+        aggregator.feed(b"garbage")
+        aggregator.feed(b"prefix.view.get.app.views.index.total:1|ms|@x")
+
+        summary = aggregator.summary()
+        assert summary["packets"] == 9
+        assert list(summary["views"]) == ["get.app.views.index"]
+        stats = summary["views"]["get.app.views.index"]
+        assert stats["count"] == 3
+        assert stats["mean"] == 100
+        assert stats["max"] == 100
+        assert stats["sql_count"] == 2
+        assert stats["sql_share"] == 0.4
+        assert stats["redis_count"] == 1
+        assert stats["redis_share"] == 0.05
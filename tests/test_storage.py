@@ -0,0 +1,118 @@
+import io
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+import mock
+from django import test
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, InMemoryStorage, storages
+from django_statsd import backends, middleware, storage
+from django_statsd.backends import memory
+
+
+class LazyFile(File):
+    """Like the files of S3 style storages, only downloads when used"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.mode = "rb"
+        self.data = data
+        self.loaded = False
+        self._file = None
+
+    @property
+    def file(self):
+        if self._file is None:
+            self.loaded = True
+            self._file = io.BytesIO(self.data)
+        return self._file
+
+
+class LazyStorage(InMemoryStorage):
+    def _open(self, name, mode="rb"):
+        return LazyFile(name, InMemoryStorage._open(self, name, mode).read())
+
+
+class TestStorage(TestCase):
+    def setUp(self):
+        storage.patch()
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        settings = test.override_settings(
+            STORAGES={
+                "default": {
+                    "BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {"location": location, "base_url": "/media/"},
+                },
+                # An in process object store
+                "objects": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+                "lazy": {"BACKEND": "tests.test_storage.LazyStorage"},
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_operations(self):
+        middleware.StatsdMiddleware.start()
+        for alias in ("default", "objects"):
+            backend = storages[alias]
+            name = backend.save("spam.txt", ContentFile(b"eggs" * 10))
+            assert backend.exists(name)
+            backend.url(name)
+            with backend.open(name) as fh:
+                assert fh.read(30) == b"eggs" * 7 + b"eg"
+                fh.read()
+            backend.delete(name)
+        middleware.StatsdMiddleware.stop("view")
+
+        assert isinstance(storages["default"], FileSystemStorage)
+        for alias in ("default", "objects"):
+            prefix = "prefix.view.view.storage.%s." % alias
+            assert self.backend.counters[prefix + "bytes_written"] == 40
+            assert self.backend.counters[prefix + "bytes_read"] == 40
+            for operation in ("save", "exists", "url", "open", "delete"):
+                assert len(self.backend.timers[prefix + operation]) == 1, operation
+
+    def test_lazy_file(self):
+        backend = storages["lazy"]
+        name = backend.save("spam.txt", ContentFile(b"eggs\n" * 10))
+        middleware.StatsdMiddleware.start()
+        fh = backend.open(name)
+        assert not fh.loaded
+        assert fh.readline() == b"eggs\n"
+        assert b"".join(fh.chunks(chunk_size=8)) == b"eggs\n" * 10
+        middleware.StatsdMiddleware.stop("view")
+
+        assert isinstance(fh, LazyFile)
+        assert self.backend.counters["prefix.view.view.storage.lazy.bytes_read"] == 55
+
+    def test_concurrent(self):
+        backend = storages["objects"]
+        saving = threading.Event()
+        done = threading.Event()
+        content = ContentFile(b"eggs")
+        chunks = content.chunks
+
+        def slow_chunks(*args, **kwargs):
+            saving.set()
+            done.wait(5)
+            return chunks(*args, **kwargs)
+
+        content.chunks = slow_chunks
+        thread = threading.Thread(target=backend.save, args=("spam.txt", content))
+        thread.start()
+        try:
+            saving.wait(5)
+            middleware.StatsdMiddleware.start()
+            backend.exists("eggs.txt")
+            middleware.StatsdMiddleware.stop("view")
+        finally:
+            done.set()
+            thread.join()
+
+        assert len(self.backend.timers["prefix.view.view.storage.objects.exists"]) == 1
@@ -0,0 +1,67 @@
+from unittest import TestCase
+import mock
+from django.template import Context, Engine
+from django_statsd import backends, cardinality, middleware, templates
+from django_statsd.backends import memory
+
+PREFIX = "prefix.view.view.template.django."
+
+
+class TestTemplates(TestCase):
+    def setUp(self):
+        cardinality.reset()
+        self.addCleanup(cardinality.reset)
+        self.backend = memory.MemoryBackend()
+        patcher = mock.patch.object(backends, "_backend", self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.engine = Engine(
+            loaders=[
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        (
+                            "django.template.loaders.locmem.Loader",
+                            {
+                                "index.html": "{% include 'item.html' %}",
+                                "item.html": "{{ name }}",
+                            },
+                        )
+                    ],
+                )
+            ]
+        )
+
+    def test_render(self):
+        middleware.StatsdMiddleware.start()
+        template = self.engine.get_template("index.html")
+        assert template.render(Context(dict(name="spam"))) == "spam"
+        self.engine.get_template("index.html").render(Context())
+        middleware.StatsdMiddleware.stop("view")
+
+        timers = self.backend.timers
+        assert len(timers[PREFIX + "render.index_html"]) == 1
+        assert len(timers[PREFIX + "render.item_html"]) == 1
+        assert len(timers[PREFIX + "load.index_html"]) == 1
+        counters = self.backend.counters
+        # Both templates are loaded by both renders, only the first misses
+        assert counters[PREFIX + "cache_miss"] == 2
+        assert counters[PREFIX + "cache_hit"] == 2
+
+    def test_not_detailed(self):
+        scope = middleware.StatsdMiddleware.start()
+        scope.detailed = False
+        self.engine.get_template("index.html").render(Context())
+        middleware.StatsdMiddleware.stop("view")
+
+        assert not [key for key in self.backend.timers if ".template." in key]
+
+    def test_cardinality(self):
+        with mock.patch.dict(
+            "django_statsd.settings.STATSD_CARDINALITY_LIMITS", {"template": 1}
+        ):
+            assert templates.template_key("spam/eggs.html") == "spam_eggs_html"
+            assert templates.template_key("other.html") == "other"
+            assert templates.template_key("spam/eggs.html") == "spam_eggs_html"
+        overflow = "prefix.statsd.cardinality_overflow.template"
+        assert self.backend.counters[overflow] == 1